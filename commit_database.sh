@@ -4,6 +4,9 @@
 
 COMMIT_MSG="${1:-Update investors database}"
 
+echo "🗄️  Checkpointing WAL into the database file..."
+python -c "import sqlite3; sqlite3.connect('data/investors.db').execute('PRAGMA wal_checkpoint(TRUNCATE)')"
+
 echo "📦 Adding database to Git..."
 git add -f data/investors.db
 
@@ -5,25 +5,30 @@ Main application interface for uploading, cleaning, searching, and exporting dat
 
 import streamlit as st
 import pandas as pd
+import numpy as np
 import json
+import os
 import sys
+import sqlite3
 import io
+import hashlib
+import shutil
 from pathlib import Path
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
 
 # Import our modules
 
 # Add src directory to path for imports
 sys.path.insert(0, str(Path(__file__).parent))
 
-from ingest import load_file, filter_sheets, get_file_info
 from clean import clean_dataframe, load_column_mapping
 from database import (
-    init_database, load_all_investors, search_investors,
+    init_database, load_all_investors, search_investors, search_investor_ids,
     get_statistics, export_schema, get_column_usage_stats,
-    get_unused_columns, remove_unused_columns, update_investor_from_dataframe
+    get_unused_columns, remove_unused_columns, update_investor_from_dataframe,
+    dump_database
 )
-from merge import ingest_and_merge
 
 # Page configuration
 st.set_page_config(
@@ -34,26 +39,193 @@ st.set_page_config(
 )
 
 # Initialize session state
-if 'data_loaded' not in st.session_state:
-    st.session_state.data_loaded = False
 if 'df' not in st.session_state:
     st.session_state.df = pd.DataFrame()
-if 'original_filtered_df' not in st.session_state:
-    st.session_state.original_filtered_df = pd.DataFrame()
-if 'last_saved_df' not in st.session_state:
-    st.session_state.last_saved_df = pd.DataFrame()
+if 'df_version' not in st.session_state:
+    st.session_state.df_version = None
+if 'last_saved_hashes' not in st.session_state:
+    st.session_state.last_saved_hashes = {}
+if 'last_saved_all_hashes' not in st.session_state:
+    st.session_state.last_saved_all_hashes = {}
+
+
+# Cached results are keyed on the database version; keep only the last few
+# versions so stale entries don't pile up after every edit or ingest
+CACHE_MAX_VERSIONS = 4
+
+# Uploads are streamed to disk in chunks of this size instead of being buffered whole
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+
+def get_connection(db_path: str = "data/investors.db") -> sqlite3.Connection:
+    """
+    This session's SQLite connection, reused across its reruns.
+    Every browser session opens its own, so one session's commit or rollback
+    never ends another session's transaction. Schema, indexes and pragmas are
+    set up when it is opened; it is reopened if the database file was replaced
+    (Import Database swaps in a new file rather than writing over the old one).
+    """
+    connections = st.session_state.setdefault('db_connections', {})
+    cached = connections.get(db_path)
+    if cached is not None:
+        conn, inode = cached
+        if os.path.exists(db_path) and os.stat(db_path).st_ino == inode:
+            return conn
+        conn.close()
+    
+    conn = init_database(db_path, check_same_thread=False)
+    connections[db_path] = (conn, os.stat(db_path).st_ino)
+    return conn
+
+
+def close_connection(db_path: str = "data/investors.db") -> None:
+    """Close this session's connection, if it has one (other sessions keep theirs)."""
+    cached = st.session_state.get('db_connections', {}).pop(db_path, None)
+    if cached is not None:
+        cached[0].close()
+
+
+def db_version(db_path: str = "data/investors.db") -> tuple:
+    """
+    Cheap fingerprint of the database files, used as a cache key.
+    Includes the WAL file since committed writes may only land there until checkpoint.
+    """
+    version = []
+    for path in (db_path, f"{db_path}-wal"):
+        try:
+            version.append(os.stat(path).st_mtime_ns)
+        except FileNotFoundError:
+            version.append(0)
+    return tuple(version)
+
+
+@st.cache_data(show_spinner=False, max_entries=CACHE_MAX_VERSIONS)
+def _cached_load(version: tuple, db_path: str) -> pd.DataFrame:
+    """Load all investors; re-runs only when the database fingerprint changes."""
+    return load_all_investors(db_path, conn=get_connection(db_path))
+
+
+@st.cache_data(show_spinner=False, max_entries=CACHE_MAX_VERSIONS)
+def _cached_statistics(version: tuple, db_path: str) -> dict:
+    """Database statistics; re-runs only when the database fingerprint changes."""
+    return get_statistics(db_path, conn=get_connection(db_path))
+
+
+@st.cache_data(show_spinner=False, max_entries=CACHE_MAX_VERSIONS)
+def _cached_column_usage(version: tuple, db_path: str) -> tuple:
+    """Column usage stats and unused columns; re-runs only when the database fingerprint changes."""
+    conn = get_connection(db_path)
+    column_stats = get_column_usage_stats(conn)
+    return column_stats, get_unused_columns(conn, min_usage_percent=0.0, stats=column_stats)
+
+
+@st.cache_data(show_spinner=False, max_entries=128)
+def _cached_search_ids(version: tuple, db_path: str, search_text: str) -> list:
+    """Ids of investors matching a full-text query, via the database FTS index."""
+    return search_investor_ids(db_path, search_text, conn=get_connection(db_path))
+
+
+@st.cache_data(show_spinner=False, max_entries=CACHE_MAX_VERSIONS)
+def _cached_countries(version: tuple, _df: pd.DataFrame) -> list:
+    """Sorted unique countries for the filter widgets, computed once per database version."""
+    if _df.empty or 'country' not in _df.columns:
+        return []
+    return sorted(_df['country'].dropna().unique())
+
+
+@st.cache_data(show_spinner=False, max_entries=CACHE_MAX_VERSIONS)
+def _cached_deal_size_cap(version: tuple, _df: pd.DataFrame) -> float:
+    """Default for the max deal size filter: 10% above the largest deal, once per database version."""
+    # Use a large finite number instead of infinity
+    if _df.empty or 'deal_size_max' not in _df.columns or not _df['deal_size_max'].notna().any():
+        return 1_000_000_000_000.0  # 1 trillion as default max
+    return float(_df['deal_size_max'].max()) * 1.1  # 10% above max
+
+
+def column_hashes(df: pd.DataFrame) -> dict:
+    """
+    Order-sensitive content hash of each column (8 bytes each), so the editor's
+    saved state can be tracked without keeping a copy of the data.
+    """
+    return {
+        col: hashlib.blake2b(
+            pd.util.hash_pandas_object(df[col], index=False).to_numpy().tobytes(),
+            digest_size=8
+        ).hexdigest()
+        for col in df.columns
+    }
+
+
+def df_fingerprint(df: pd.DataFrame, hashes: dict = None) -> tuple:
+    """Cheap content hash of a DataFrame, used to key cached exports."""
+    if hashes is None:
+        hashes = column_hashes(df)
+    return (len(df), tuple(hashes.items()))
+
+
+@st.cache_data(show_spinner=False, max_entries=CACHE_MAX_VERSIONS)
+def _export_csv(fingerprint: tuple, _df: pd.DataFrame) -> str:
+    """CSV export, serialized at most once per unique DataFrame content."""
+    return _df.to_csv(index=False)
+
+
+@st.cache_data(show_spinner=False, max_entries=CACHE_MAX_VERSIONS)
+def _export_json(fingerprint: tuple, _df: pd.DataFrame) -> str:
+    """Compact JSON records export, serialized at most once per unique DataFrame content."""
+    return _df.to_json(orient='records')
+
+
+def find_changed_rows(edited_df: pd.DataFrame, saved_df: pd.DataFrame,
+                      columns: list = None) -> pd.DataFrame:
+    """
+    Rows of an edited DataFrame whose values differ from the last saved version.
+    Rows are compared by position, ignoring 'id'; two missing values count as equal.
+    Only the given columns are compared if provided.
+    """
+    if 'id' not in edited_df.columns or 'id' not in saved_df.columns:
+        return edited_df.iloc[0:0]
+    
+    n_rows = min(len(edited_df), len(saved_df))
+    cols = [
+        col for col in (edited_df.columns if columns is None else columns)
+        if col != 'id' and col in saved_df.columns
+    ]
+    edited = edited_df[cols].iloc[:n_rows].reset_index(drop=True)
+    saved = saved_df[cols].iloc[:n_rows].reset_index(drop=True)
+    
+    edited_na = edited.isna()
+    saved_na = saved.isna()
+    differs = (edited_na != saved_na) | (edited.ne(saved) & ~edited_na & ~saved_na)
+    changed_mask = differs.any(axis=1).to_numpy(dtype=bool)
+    
+    return edited_df.iloc[:n_rows][changed_mask].reset_index(drop=True)
+
+
+def edited_row_positions(editor_key: str) -> list:
+    """Row positions st.data_editor has recorded edits for in its widget state."""
+    editor_state = st.session_state.get(editor_key) or {}
+    return sorted(int(pos) for pos in editor_state.get("edited_rows", {}))
 
 
 def load_data():
-    """Load data from database and update session state."""
+    """
+    Load data from database and update session state.
+    Idempotent: the DataFrame is only replaced when the database version changed.
+    """
     try:
         db_path = "data/investors.db"
-        st.session_state.df = load_all_investors(db_path)
-        st.session_state.data_loaded = True
+        version = db_version(db_path)
+        if version != st.session_state.df_version:
+            st.session_state.df = _cached_load(version, db_path)
+            st.session_state.df_version = version
     except Exception as e:
         st.error(f"Error loading data: {str(e)}")
         st.session_state.df = pd.DataFrame()
-        st.session_state.data_loaded = False
+        st.session_state.df_version = None
+
+
+# Refresh once per rerun, before any tab renders (no-op unless the database changed)
+load_data()
 
 
 # Sidebar
@@ -64,7 +236,7 @@ with st.sidebar:
     # Statistics
     st.subheader("📈 Statistics")
     try:
-        stats = get_statistics("data/investors.db")
+        stats = _cached_statistics(db_version("data/investors.db"), "data/investors.db")
         st.metric("Total Investors", stats.get("total_investors", 0))
         st.metric("Countries", len(stats.get("countries", [])))
         st.metric("Source Files", len(stats.get("sources", [])))
@@ -133,6 +305,11 @@ with tab1:
             )
         
         if st.button("🚀 Clean & Merge", type="primary", width='stretch'):
+            # Imported here so sessions that never ingest don't load the
+            # parsers and fuzzy matching libraries
+            from ingest import load_file_cached, filter_sheets
+            from merge import ingest_and_merge
+            
             progress_bar = st.progress(0)
             status_text = st.empty()
             
@@ -145,32 +322,47 @@ with tab1:
             # Ensure data/raw directory exists
             Path("data/raw").mkdir(parents=True, exist_ok=True)
             
-            for idx, uploaded_file in enumerate(uploaded_files):
-                try:
-                    status_text.text(f"Processing {uploaded_file.name}...")
-                    
-                    # Save uploaded file
-                    save_path = f"data/raw/{uploaded_file.name}"
-                    with open(save_path, "wb") as f:
-                        f.write(uploaded_file.getbuffer())
-                    
-                    # Process file
-                    result = ingest_and_merge(
-                        save_path,
-                        db_path="data/investors.db",
-                        merge_strategy=merge_strategy,
-                        fuzzy_threshold=fuzzy_threshold
-                    )
-                    
-                    results_summary["files_processed"] += 1
-                    results_summary["total_rows_added"] += result.get("rows_added", 0)
-                    results_summary["total_errors"] += len(result.get("errors", []))
-                    
-                    progress_bar.progress((idx + 1) / len(uploaded_files))
-                    
-                except Exception as e:
-                    st.error(f"Error processing {uploaded_file.name}: {str(e)}")
-                    results_summary["total_errors"] += 1
+            # Save all uploaded files first
+            save_paths = []
+            for uploaded_file in uploaded_files:
+                save_path = f"data/raw/{uploaded_file.name}"
+                uploaded_file.seek(0)
+                with open(save_path, "wb") as f:
+                    shutil.copyfileobj(uploaded_file, f, length=UPLOAD_CHUNK_SIZE)
+                save_paths.append(save_path)
+            
+            def load_sheets(path):
+                return filter_sheets(load_file_cached(path))
+            
+            # Parse files in background threads while earlier files are merged.
+            # Merging stays sequential (in upload order) so each file is
+            # deduplicated against everything ingested before it.
+            with ThreadPoolExecutor(max_workers=min(4, len(save_paths))) as executor:
+                loaders = [executor.submit(load_sheets, path) for path in save_paths]
+                
+                for idx, (uploaded_file, save_path, loader) in enumerate(zip(uploaded_files, save_paths, loaders)):
+                    try:
+                        status_text.text(f"Processing {uploaded_file.name}...")
+                        
+                        # Process file
+                        result = ingest_and_merge(
+                            save_path,
+                            db_path="data/investors.db",
+                            merge_strategy=merge_strategy,
+                            fuzzy_threshold=fuzzy_threshold,
+                            sheets=loader.result(),
+                            conn=get_connection("data/investors.db")
+                        )
+                        
+                        results_summary["files_processed"] += 1
+                        results_summary["total_rows_added"] += result.get("rows_added", 0)
+                        results_summary["total_errors"] += len(result.get("errors", []))
+                        
+                        progress_bar.progress((idx + 1) / len(uploaded_files))
+                        
+                    except Exception as e:
+                        st.error(f"Error processing {uploaded_file.name}: {str(e)}")
+                        results_summary["total_errors"] += 1
             
             status_text.empty()
             progress_bar.empty()
@@ -189,10 +381,6 @@ with tab1:
 with tab2:
     st.header("Search & Filter Investors")
     
-    # Load data if not loaded
-    if not st.session_state.data_loaded:
-        load_data()
-    
     if st.session_state.df.empty:
         st.info("📭 No data available. Upload files in the 'Upload & Process' tab.")
     else:
@@ -209,7 +397,7 @@ with tab2:
         with col2:
             country_filter = st.multiselect(
                 "🌍 Filter by Country",
-                options=sorted(st.session_state.df['country'].dropna().unique()) if 'country' in st.session_state.df.columns else [],
+                options=_cached_countries(st.session_state.df_version, st.session_state.df),
                 help="Select one or more countries"
             )
         
@@ -230,10 +418,7 @@ with tab2:
                 )
             
             with col3:
-                # Use a large finite number instead of infinity
-                max_default = 1_000_000_000_000.0  # 1 trillion as default max
-                if not st.session_state.df.empty and st.session_state.df['deal_size_max'].notna().any():
-                    max_default = float(st.session_state.df['deal_size_max'].max()) * 1.1  # 10% above max
+                max_default = _cached_deal_size_cap(st.session_state.df_version, st.session_state.df)
                 
                 max_deal_size = st.number_input(
                     "💰 Max Deal Size ($)",
@@ -244,58 +429,51 @@ with tab2:
                     help="Leave at default or set to filter by maximum deal size"
                 )
         
-        # Apply filters
-        filtered_df = st.session_state.df.copy()
+        # Apply filters: compose one boolean mask, then select rows once
+        df = st.session_state.df
+        mask = np.ones(len(df), dtype=bool)
         
         if search_text:
-            mask = filtered_df.apply(
-                lambda row: search_text.lower() in str(row).lower(),
-                axis=1
-            )
-            filtered_df = filtered_df[mask]
+            matching_ids = _cached_search_ids(st.session_state.df_version, "data/investors.db", search_text)
+            mask &= df['id'].isin(matching_ids).to_numpy()
         
         if country_filter:
-            filtered_df = filtered_df[filtered_df['country'].isin(country_filter)]
+            mask &= df['country'].isin(country_filter).to_numpy()
         
         if location_filter:
-            filtered_df = filtered_df[
-                filtered_df['location'].str.contains(location_filter, case=False, na=False)
-            ]
+            mask &= df['location'].str.contains(location_filter, case=False, na=False).to_numpy(dtype=bool)
         
         if min_deal_size > 0:
-            filtered_df = filtered_df[
-                (filtered_df['deal_size_max'] >= min_deal_size) |
-                (filtered_df['deal_size_max'].isna())
-            ]
+            mask &= ((df['deal_size_max'] >= min_deal_size) | df['deal_size_max'].isna()).to_numpy()
         
         # Only apply max filter if it's been changed from a very large default
         # Use 1 trillion as threshold to detect if user actually set a limit
         if max_deal_size < 1_000_000_000_000.0:
-            filtered_df = filtered_df[
-                (filtered_df['deal_size_max'] <= max_deal_size) |
-                (filtered_df['deal_size_max'].isna())
-            ]
+            mask &= ((df['deal_size_max'] <= max_deal_size) | df['deal_size_max'].isna()).to_numpy()
+        
+        filtered_df = df.loc[mask]
         
         # Display results
         st.metric("Results", len(filtered_df))
         
         if not filtered_df.empty:
-            # Store original for comparison (only if it's a new filter)
+            # Fingerprint the saved state for comparison (only if it's a new filter or data version)
             filter_key = f"{search_text}_{country_filter}_{location_filter}_{min_deal_size}_{max_deal_size}"
-            if 'current_filter_key' not in st.session_state or st.session_state.current_filter_key != filter_key:
-                st.session_state.original_filtered_df = filtered_df.copy()
-                st.session_state.last_saved_df = filtered_df.copy()
-                st.session_state.current_filter_key = filter_key
+            saved_key = (filter_key, st.session_state.df_version)
+            if st.session_state.get('current_saved_key') != saved_key:
+                st.session_state.last_saved_hashes = column_hashes(filtered_df)
+                st.session_state.current_saved_key = saved_key
             
-            # Prepare editable dataframe (keep original numeric values for editing)
-            editable_df = filtered_df.copy()
+            # filtered_df is already a new frame (keep original numeric values for editing)
+            editable_df = filtered_df
             
             # Use data_editor for inline editing
             st.info("💡 **Tip**: Double-click any cell to edit. Changes are saved automatically when you press Enter or click outside the cell.")
             
+            editor_key = f"investor_editor_{filter_key}"
             edited_df = st.data_editor(
                 editable_df,
-                key=f"investor_editor_{filter_key}",
+                key=editor_key,
                 width='stretch',
                 height=600,
                 num_rows="fixed",
@@ -303,64 +481,49 @@ with tab2:
                 hide_index=True
             )
             
-            # Check if data was modified by comparing with last saved version
-            # Reset index for proper comparison
-            edited_comparison = edited_df.reset_index(drop=True)
-            saved_comparison = st.session_state.last_saved_df.reset_index(drop=True)
-            
-            # Compare dataframes (handles NaN properly)
-            if not edited_comparison.equals(saved_comparison):
-                # Find changed rows by comparing each row
-                if 'id' in edited_comparison.columns and 'id' in saved_comparison.columns:
-                    changed_rows = []
-                    for idx in range(min(len(edited_comparison), len(saved_comparison))):
-                        row_edited = edited_comparison.iloc[idx]
-                        row_original = saved_comparison.iloc[idx]
-                        
-                        # Compare values, handling NaN properly
-                        values_changed = False
-                        for col in edited_comparison.columns:
-                            if col == 'id':
-                                continue
-                            val_edited = row_edited[col]
-                            val_original = row_original[col]
-                            
-                            # Handle NaN comparison
-                            if pd.isna(val_edited) and pd.isna(val_original):
-                                continue
-                            elif pd.isna(val_edited) or pd.isna(val_original):
-                                values_changed = True
-                                break
-                            elif val_edited != val_original:
-                                values_changed = True
-                                break
-                        
-                        if values_changed:
-                            changed_rows.append(edited_comparison.iloc[[idx]])
-                    
-                    if changed_rows:
-                        # Save changes to database
-                        try:
-                            conn = init_database("data/investors.db")
-                            changes_df = pd.concat(changed_rows, ignore_index=True)
+            # Nothing to compare unless the editor recorded edited cells; then
+            # diff only the edited rows, and only in the columns whose hashes differ
+            edited_positions = edited_row_positions(editor_key)
+            if edited_positions:
+                edited_hashes = column_hashes(edited_df)
+                changed_cols = [
+                    col for col, col_hash in edited_hashes.items()
+                    if st.session_state.last_saved_hashes.get(col) != col_hash
+                ]
+            else:
+                edited_hashes = st.session_state.last_saved_hashes
+                changed_cols = []
+            if changed_cols:
+                changes_df = find_changed_rows(
+                    edited_df.iloc[edited_positions], filtered_df.iloc[edited_positions], columns=changed_cols
+                )
+                
+                if not changes_df.empty:
+                    # Save changes to database
+                    try:
+                        conn = get_connection("data/investors.db")
+                        # One transaction per save; rolled back if any update fails
+                        with conn:
                             updated_count = update_investor_from_dataframe(conn, changes_df)
-                            conn.close()
-                            
-                            if updated_count > 0:
-                                st.success(f"✅ Saved {updated_count} change(s) to database!")
-                                # Update the saved dataframe
-                                st.session_state.last_saved_df = edited_df.copy()
-                                # Reload data to reflect changes
-                                load_data()
-                                st.rerun()
-                        except Exception as e:
-                            st.error(f"Error saving changes: {str(e)}")
+                        
+                        if updated_count > 0:
+                            st.success(f"✅ Saved {updated_count} change(s) to database!")
+                            # Update the saved dataframe
+                            st.session_state.last_saved_hashes = edited_hashes
+                            # Reload data to reflect changes
+                            _cached_load.clear()
+                            load_data()
+                            st.rerun()
+                    except Exception as e:
+                        st.error(f"Error saving changes: {str(e)}")
             
             # Export options (use edited dataframe)
             col1, col2, col3 = st.columns(3)
             
+            export_key = df_fingerprint(edited_df, edited_hashes)
+            
             with col1:
-                csv = edited_df.to_csv(index=False)
+                csv = _export_csv(export_key, edited_df)
                 st.download_button(
                     "📥 Download CSV",
                     csv,
@@ -370,7 +533,7 @@ with tab2:
                 )
             
             with col2:
-                json_str = edited_df.to_json(orient='records', indent=2)
+                json_str = _export_json(export_key, edited_df)
                 st.download_button(
                     "📥 Download JSON",
                     json_str,
@@ -380,9 +543,12 @@ with tab2:
                 )
             
             with col3:
-                # Copy to clipboard button (for Supabase)
-                st.code(json_str[:500] + "..." if len(json_str) > 500 else json_str, language="json")
-                st.caption("Copy JSON above for Supabase import")
+                # Copy to clipboard button (for Supabase), rendered only on request
+                if st.checkbox("Show Supabase JSON preview", value=False):
+                    # Pretty-print only the first few records for the preview
+                    json_preview = edited_df.head(3).to_json(orient='records', indent=2)
+                    st.code(json_preview + "..." if len(edited_df) > 3 else json_preview, language="json")
+                    st.caption("Copy JSON above for Supabase import")
         else:
             st.info("No results match your filters. Try adjusting your search criteria.")
 
@@ -390,29 +556,21 @@ with tab2:
 with tab3:
     st.header("View All Data")
     
-    if not st.session_state.data_loaded:
-        load_data()
-    
     if st.session_state.df.empty:
         st.info("📭 No data available. Upload files in the 'Upload & Process' tab.")
     else:
         st.metric("Total Investors", len(st.session_state.df))
         
-        # Initialize saved dataframe for "View All Data" tab
-        if 'original_all_df' not in st.session_state:
-            st.session_state.original_all_df = st.session_state.df.copy()
-            st.session_state.last_saved_all_df = st.session_state.df.copy()
-        
-        # Update if the underlying data changed
-        if not st.session_state.df.equals(st.session_state.original_all_df):
-            st.session_state.original_all_df = st.session_state.df.copy()
-            st.session_state.last_saved_all_df = st.session_state.df.copy()
+        # Fingerprint the saved state for "View All Data" (refreshed when the underlying data changed)
+        if st.session_state.get('current_saved_all_version') != st.session_state.df_version:
+            st.session_state.last_saved_all_hashes = column_hashes(st.session_state.df)
+            st.session_state.current_saved_all_version = st.session_state.df_version
         
         st.info("💡 **Tip**: Double-click any cell to edit. Changes are saved automatically when you press Enter or click outside the cell.")
         
         # Use data_editor for inline editing
         edited_all_df = st.data_editor(
-            st.session_state.df.copy(),
+            st.session_state.df,
             key="investor_editor_all",
             width='stretch',
             height=600,
@@ -421,63 +579,47 @@ with tab3:
             hide_index=True
         )
         
-        # Check if data was modified by comparing with last saved version
-        # Reset index for proper comparison
-        edited_all_comparison = edited_all_df.reset_index(drop=True)
-        saved_all_comparison = st.session_state.last_saved_all_df.reset_index(drop=True)
-        
-        # Compare dataframes (handles NaN properly)
-        if not edited_all_comparison.equals(saved_all_comparison):
-            # Find changed rows by comparing each row
-            if 'id' in edited_all_comparison.columns and 'id' in saved_all_comparison.columns:
-                changed_rows = []
-                for idx in range(min(len(edited_all_comparison), len(saved_all_comparison))):
-                    row_edited = edited_all_comparison.iloc[idx]
-                    row_original = saved_all_comparison.iloc[idx]
-                    
-                    # Compare values, handling NaN properly
-                    values_changed = False
-                    for col in edited_all_comparison.columns:
-                        if col == 'id':
-                            continue
-                        val_edited = row_edited[col]
-                        val_original = row_original[col]
-                        
-                        # Handle NaN comparison
-                        if pd.isna(val_edited) and pd.isna(val_original):
-                            continue
-                        elif pd.isna(val_edited) or pd.isna(val_original):
-                            values_changed = True
-                            break
-                        elif val_edited != val_original:
-                            values_changed = True
-                            break
-                    
-                    if values_changed:
-                        changed_rows.append(edited_all_comparison.iloc[[idx]])
-                
-                if changed_rows:
-                    # Save changes to database
-                    try:
-                        conn = init_database("data/investors.db")
-                        changes_df = pd.concat(changed_rows, ignore_index=True)
+        # Nothing to compare unless the editor recorded edited cells; then
+        # diff only the edited rows, and only in the columns whose hashes differ
+        edited_positions = edited_row_positions("investor_editor_all")
+        if edited_positions:
+            edited_all_hashes = column_hashes(edited_all_df)
+            changed_cols = [
+                col for col, col_hash in edited_all_hashes.items()
+                if st.session_state.last_saved_all_hashes.get(col) != col_hash
+            ]
+        else:
+            edited_all_hashes = st.session_state.last_saved_all_hashes
+            changed_cols = []
+        if changed_cols:
+            changes_df = find_changed_rows(
+                edited_all_df.iloc[edited_positions], st.session_state.df.iloc[edited_positions], columns=changed_cols
+            )
+            
+            if not changes_df.empty:
+                # Save changes to database
+                try:
+                    conn = get_connection("data/investors.db")
+                    # One transaction per save; rolled back if any update fails
+                    with conn:
                         updated_count = update_investor_from_dataframe(conn, changes_df)
-                        conn.close()
-                        
-                        if updated_count > 0:
-                            st.success(f"✅ Saved {updated_count} change(s) to database!")
-                            # Update the saved dataframe
-                            st.session_state.last_saved_all_df = edited_all_df.copy()
-                            # Reload data to reflect changes
-                            load_data()
-                            st.rerun()
-                    except Exception as e:
-                        st.error(f"Error saving changes: {str(e)}")
+                    
+                    if updated_count > 0:
+                        st.success(f"✅ Saved {updated_count} change(s) to database!")
+                        # Update the saved dataframe
+                        st.session_state.last_saved_all_hashes = edited_all_hashes
+                        # Reload data to reflect changes
+                        _cached_load.clear()
+                        load_data()
+                        st.rerun()
+                except Exception as e:
+                    st.error(f"Error saving changes: {str(e)}")
         
         # Export all (use edited dataframe)
         col1, col2 = st.columns(2)
+        export_all_key = df_fingerprint(edited_all_df, edited_all_hashes)
         with col1:
-            csv_all = edited_all_df.to_csv(index=False)
+            csv_all = _export_csv(export_all_key, edited_all_df)
             st.download_button(
                 "📥 Download All (CSV)",
                 csv_all,
@@ -486,7 +628,7 @@ with tab3:
                 width='stretch'
             )
         with col2:
-            json_all = edited_all_df.to_json(orient='records', indent=2)
+            json_all = _export_json(export_all_key, edited_all_df)
             st.download_button(
                 "📥 Download All (JSON)",
                 json_all,
@@ -533,7 +675,7 @@ with tab4:
     with research_col1:
         research_country = st.selectbox(
             "Select Country",
-            options=sorted(st.session_state.df['country'].dropna().unique()) if not st.session_state.df.empty and 'country' in st.session_state.df.columns else [],
+            options=_cached_countries(st.session_state.df_version, st.session_state.df),
             help="Select a country to research investors from"
         )
     with research_col2:
@@ -564,9 +706,7 @@ with tab4:
     st.markdown("View which columns are being used and remove unused columns.")
     
     try:
-        conn = init_database("data/investors.db")
-        column_stats = get_column_usage_stats(conn)
-        unused_cols = get_unused_columns(conn, min_usage_percent=0.0)
+        column_stats, unused_cols = _cached_column_usage(db_version("data/investors.db"), "data/investors.db")
         
         if column_stats:
             # Show column usage table
@@ -591,6 +731,7 @@ with tab4:
                 with col1:
                     if st.button("🗑️ Remove Unused Columns", type="primary"):
                         try:
+                            conn = get_connection("data/investors.db")
                             removed = remove_unused_columns(conn, unused_cols, preserve_essential=True)
                             st.success(f"✅ Removed {removed} unused column(s)!")
                             st.rerun()
@@ -601,8 +742,6 @@ with tab4:
                     st.caption("This will permanently remove columns with no data. Essential columns (name, location, etc.) are protected.")
             else:
                 st.success("✅ All columns are being used!")
-        
-        conn.close()
     except Exception as e:
         st.error(f"Error loading column stats: {str(e)}")
     
@@ -610,7 +749,7 @@ with tab4:
     
     st.subheader("Database Info")
     try:
-        stats = get_statistics("data/investors.db")
+        stats = _cached_statistics(db_version("data/investors.db"), "data/investors.db")
         # Remove column_usage from main stats display (shown above)
         display_stats = {k: v for k, v in stats.items() if k != 'column_usage'}
         st.json(display_stats)
@@ -628,6 +767,8 @@ with tab4:
         # Download actual database file
         db_path = "data/investors.db"
         if Path(db_path).exists():
+            # Move committed pages out of the WAL so the file alone is the whole database
+            get_connection(db_path).execute("PRAGMA wal_checkpoint(TRUNCATE)")
             with open(db_path, "rb") as f:
                 db_bytes = f.read()
                 st.download_button(
@@ -644,32 +785,18 @@ with tab4:
         # Export SQL dump
         if st.button("📤 Export SQL Dump"):
             try:
-                import subprocess
-                dump_path = "investors_dump.sql"
+                buf = io.StringIO()
+                buf.writelines(f"{statement}\n" for statement in dump_database(get_connection(db_path)))
                 
-                result = subprocess.run(
-                    ["sqlite3", db_path, ".dump"],
-                    capture_output=True,
-                    text=True
+                st.download_button(
+                    "📥 Download SQL Dump",
+                    buf.getvalue(),
+                    "investors_dump.sql",
+                    "text/plain"
                 )
-                
-                if result.returncode == 0:
-                    with open(dump_path, "w") as f:
-                        f.write(result.stdout)
-                    
-                    with open(dump_path, "r") as f:
-                        st.download_button(
-                            "📥 Download SQL Dump",
-                            f.read(),
-                            "investors_dump.sql",
-                            "text/plain"
-                        )
-                    st.success("SQL dump created!")
-                else:
-                    st.error(f"Error creating dump: {result.stderr}")
+                st.success("SQL dump created!")
             except Exception as e:
                 st.error(f"Error: {str(e)}")
-                st.info("Make sure sqlite3 is installed and available in PATH")
     
     st.markdown("---")
     st.subheader("Import Database")
@@ -687,22 +814,31 @@ with tab4:
                 # Backup current database
                 backup_path = f"data/investors_backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}.db"
                 if Path(db_path).exists():
-                    import shutil
+                    get_connection(db_path).execute("PRAGMA wal_checkpoint(TRUNCATE)")
                     shutil.copy2(db_path, backup_path)
                     st.info(f"Backup created: {backup_path}")
                 
-                # Save uploaded database
+                # Save uploaded database next to the current one
                 Path("data").mkdir(parents=True, exist_ok=True)
-                with open(db_path, "wb") as f:
-                    f.write(uploaded_db.getbuffer())
+                upload_path = f"{db_path}.upload"
+                uploaded_db.seek(0)
+                with open(upload_path, "wb") as f:
+                    shutil.copyfileobj(uploaded_db, f, length=UPLOAD_CHUNK_SIZE)
+                
+                # Release this session's connection; other sessions keep reading the
+                # old file until their next get_connection sees the new one
+                close_connection(db_path)
+                
+                # The old WAL and shared-memory files belong to the old database;
+                # left in place they would be replayed against the uploaded one
+                for suffix in ("-wal", "-shm"):
+                    Path(f"{db_path}{suffix}").unlink(missing_ok=True)
+                
+                # Swap the file in (a new inode, not a rewrite of the open one)
+                os.replace(upload_path, db_path)
                 
                 st.success("✅ Database replaced! Refreshing data...")
                 load_data()
                 st.rerun()
             except Exception as e:
                 st.error(f"Error replacing database: {str(e)}")
-
-# Initialize on first load
-if not st.session_state.data_loaded:
-    load_data()
-
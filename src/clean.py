@@ -3,24 +3,76 @@ Data Cleaning & Standardization Module
 Handles: column mapping, string cleaning, money parsing, range splitting
 """
 
+import numpy as np
 import pandas as pd
 import re
+import warnings
 from typing import Dict, Optional, List, Union
 from pathlib import Path
 import json
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
 from loguru import logger
 
 
+# Placeholder strings that clean_string / clean_string_series treat as missing
+NULL_STRINGS = frozenset({'nan', 'none', 'null', 'n/a', 'na'})
+MONEY_NULL_STRINGS = NULL_STRINGS | {'-', ''}
+
+# Parsed numeric columns, never treated as text
+NUMERIC_COLUMNS = frozenset({'deal_size_min', 'deal_size_max', 'portfolio_value', 'exit_total_value', 'no_of_rounds'})
+
+# Text columns with only a handful of distinct values per ingest
+CATEGORICAL_COLUMNS = ['country', 'preferred_round', 'source_file', 'source_sheet']
+
+# Frames larger than this are cleaned in row chunks by clean_dataframe_parallel
+PARALLEL_CHUNK_ROWS = 200_000
+
+# Patterns used per cell, compiled once
+WHITESPACE_RE = re.compile(r'\s+')
+MONEY_SYMBOLS_RE = re.compile(r'[\$€,\s]')
+MONEY_RE = re.compile(r'([\d.]+)\s*([kmbKMB]?)$', re.IGNORECASE)
+
+# Suffix multipliers for money values like "$500k" or "$1.5M"
+MONEY_MULTIPLIERS = {
+    'K': 1_000,
+    'M': 1_000_000,
+    'B': 1_000_000_000
+}
+
+
 # Load column mapping configuration
 def load_column_mapping(config_path: str = "config/column_mapping.json") -> Dict[str, List[str]]:
-    """Load column mapping from JSON config file."""
-    config_path = Path(config_path)
-    if config_path.exists():
-        with open(config_path, 'r') as f:
-            return json.load(f)
+    """Load column mapping from JSON config file (parsed once per file version)."""
+    column_mapping, _ = _load_mapping_cached(*_mapping_cache_key(config_path))
+    return {standard_name: list(variations) for standard_name, variations in column_mapping.items()}
+
+
+def _mapping_cache_key(config_path: str) -> tuple:
+    """Cache key for a mapping file: its path plus mtime, so saved edits are picked up."""
+    try:
+        return (str(config_path), Path(config_path).stat().st_mtime_ns)
+    except OSError:
+        return (str(config_path), None)
+
+
+@lru_cache(maxsize=4)
+def _load_mapping_cached(config_path: str, mtime_ns: Optional[int]) -> tuple:
+    """
+    Parse a column mapping file and build its variation lookup.
+    
+    Returns:
+        Tuple of (column_mapping, variation_lookup); shared, don't mutate
+    """
+    path = Path(config_path)
+    if mtime_ns is not None and path.exists():
+        with open(path, 'r') as f:
+            column_mapping = json.load(f)
     else:
-        logger.warning(f"Column mapping config not found at {config_path}, using defaults")
-        return {
+        logger.warning(f"Column mapping config not found at {path}, using defaults")
+        column_mapping = {
             "name": ["Name", "Investor Name", "Fund", "Company Name", "Firm"],
             "location": ["Location", "HQ", "City", "Headquarters", "Base"],
             "country": ["Country", "Nation"],
@@ -31,32 +83,47 @@ def load_column_mapping(config_path: str = "config/column_mapping.json") -> Dict
             "portfolio_value": ["Portfolio Value", "Total Portfolio", "AUM", "Assets Under Management"],
             "notable_companies": ["Notable Companies", "Portfolio Companies", "Investments", "Companies"]
         }
+    return column_mapping, build_variation_lookup(column_mapping)
+
+
+def build_variation_lookup(column_mapping: Dict[str, List[str]]) -> Dict[str, str]:
+    """
+    Case-insensitive lookup from column name variation to standard name.
+    A variation listed under several standard names maps to the last one.
+    """
+    return {
+        variation.lower().strip(): standard_name
+        for standard_name, variations in column_mapping.items()
+        for variation in variations
+    }
 
 
-def map_columns(df: pd.DataFrame, column_mapping: Dict[str, List[str]]) -> pd.DataFrame:
+def map_columns(df: pd.DataFrame, column_mapping: Dict[str, List[str]],
+                variation_lookup: Optional[Dict[str, str]] = None) -> pd.DataFrame:
     """
     Map various column name variations to standard names.
     
     Args:
         df: Input DataFrame
         column_mapping: Dictionary mapping standard names to possible variations
+        variation_lookup: Precomputed build_variation_lookup(column_mapping), if available
         
     Returns:
         DataFrame with standardized column names
     """
-    df = df.copy()
-    mapping_dict = {}
+    if variation_lookup is None:
+        variation_lookup = build_variation_lookup(column_mapping)
     
-    # Build mapping from variations to standard names
-    for standard_name, variations in column_mapping.items():
-        for variation in variations:
-            # Case-insensitive matching
-            for col in df.columns:
-                if col.lower().strip() == variation.lower().strip():
-                    mapping_dict[col] = standard_name
-                    break
+    # Only the first column matching a variation is mapped
+    mapping_dict = {}
+    seen = set()
+    for col in df.columns:
+        key = col.lower().strip()
+        if key in variation_lookup and key not in seen:
+            mapping_dict[col] = variation_lookup[key]
+        seen.add(key)
     
-    # Rename columns
+    # Rename columns (rename already returns a new frame)
     if mapping_dict:
         df = df.rename(columns=mapping_dict)
         logger.info(f"Mapped columns: {mapping_dict}")
@@ -76,15 +143,48 @@ def clean_string(value: str) -> Optional[str]:
     value = value.strip()
     
     # Remove extra whitespace
-    value = re.sub(r'\s+', ' ', value)
+    value = WHITESPACE_RE.sub(' ', value)
     
     # Return None for empty strings
-    if not value or value.lower() in ['nan', 'none', 'null', 'n/a', 'na']:
+    if not value or value.lower() in NULL_STRINGS:
         return None
     
     return value
 
 
+def clean_string_series(series: pd.Series) -> pd.Series:
+    """
+    Vectorized clean_string: same results for a whole column, using the
+    pandas str accessor instead of a Python call per cell.
+    
+    Args:
+        series: Column to clean
+        
+    Returns:
+        Object Series of cleaned strings, with None for missing/empty values
+    """
+    # Pure-text columns repeat values (countries, rounds, sources...), so clean
+    # each distinct string once. Mixed columns are cleaned cell by cell, since
+    # factorize would merge values like 1 and 1.0 that stringify differently.
+    if pd.api.types.infer_dtype(series, skipna=True) == 'string':
+        codes, uniques = pd.factorize(series)
+        cleaned = _clean_text(pd.Series(uniques, dtype=object)).to_numpy(dtype=object)
+        values = np.full(len(series), None, dtype=object)
+        present = codes >= 0
+        values[present] = cleaned[codes[present]]
+        return pd.Series(values, index=series.index, dtype=object)
+    
+    return _clean_text(series)
+
+
+def _clean_text(series: pd.Series) -> pd.Series:
+    """Vectorized body of clean_string_series."""
+    missing = series.isna()
+    text = series.astype(str).str.strip().str.replace(WHITESPACE_RE, ' ', regex=True)
+    invalid = missing | (text == '') | text.str.lower().isin(NULL_STRINGS)
+    return text.astype(object).where(~invalid, None)
+
+
 def parse_money(value: Union[str, float, int]) -> Optional[float]:
     """
     Parse money strings like "$500k", "$11.0b", "$1.5M" to float values.
@@ -106,24 +206,18 @@ def parse_money(value: Union[str, float, int]) -> Optional[float]:
         value = str(value)
     
     # Remove currency symbols (both $ and €) and whitespace
-    value = re.sub(r'[\$€,\s]', '', value.strip())
+    value = MONEY_SYMBOLS_RE.sub('', value.strip())
     
-    if not value or value.lower() in ['nan', 'none', 'null', 'n/a', 'na', '-', '']:
+    if not value or value.lower() in MONEY_NULL_STRINGS:
         return None
     
     # Extract number and multiplier
-    match = re.match(r'([\d.]+)\s*([kmbKMB]?)$', value, re.IGNORECASE)
+    match = MONEY_RE.match(value)
     if match:
         number = float(match.group(1))
         multiplier = match.group(2).upper()
         
-        multipliers = {
-            'K': 1_000,
-            'M': 1_000_000,
-            'B': 1_000_000_000
-        }
-        
-        return number * multipliers.get(multiplier, 1)
+        return number * MONEY_MULTIPLIERS.get(multiplier, 1)
     
     # Try to parse as plain number
     try:
@@ -133,6 +227,30 @@ def parse_money(value: Union[str, float, int]) -> Optional[float]:
         return None
 
 
+def parse_money_series(series: pd.Series) -> pd.Series:
+    """
+    Vectorized parse_money for a whole column. Money columns repeat a small set
+    of values ("$500k", "$1M", ...), so each distinct value is parsed once and
+    the results are broadcast back with numpy.
+    
+    Args:
+        series: Column of money strings and/or numbers
+        
+    Returns:
+        Float Series in base units (dollars), NaN where missing or unparseable
+    """
+    if pd.api.types.is_numeric_dtype(series):
+        return series.astype(float)
+    
+    codes, uniques = pd.factorize(series)
+    parsed = np.array([parse_money(value) for value in uniques], dtype=float)
+    values = np.full(len(series), np.nan)
+    present = codes >= 0
+    values[present] = parsed[codes[present]]
+    
+    return pd.Series(values, index=series.index)
+
+
 def parse_range(value: Union[str, float]) -> tuple:
     """
     Parse range strings like "$500k - $11.0b" or "1M-5M" into (min, max).
@@ -172,33 +290,75 @@ def parse_range(value: Union[str, float]) -> tuple:
     return (None, None)
 
 
+def parse_range_series(series: pd.Series) -> tuple:
+    """
+    Vectorized parse_range for a whole column, parsing each distinct value once
+    (deal size ranges repeat a lot) and broadcasting the results back.
+    
+    Args:
+        series: Column of range strings and/or numbers
+        
+    Returns:
+        Tuple of (min_series, max_series) as float Series, NaN where unparseable
+    """
+    if pd.api.types.is_numeric_dtype(series):
+        values = series.astype(float)
+        return values, values.copy()
+    
+    codes, uniques = pd.factorize(series)
+    parsed = np.array([parse_range(value) for value in uniques], dtype=float).reshape(-1, 2)
+    bounds = np.full((len(series), 2), np.nan)
+    present = codes >= 0
+    bounds[present] = parsed[codes[present]]
+    
+    return (pd.Series(bounds[:, 0], index=series.index),
+            pd.Series(bounds[:, 1], index=series.index))
+
+
+# Common country names recognized in sheet names (can be expanded);
+# earlier entries win when a sheet name mentions several
+SHEET_COUNTRIES = [
+    "Austria", "Belgium", "Bulgaria", "Croatia", "Cyprus", "Czech Republic",
+    "Denmark", "Estonia", "Finland", "France", "Germany", "Greece", "Hungary",
+    "Ireland", "Italy", "Latvia", "Lithuania", "Luxembourg", "Malta", "Netherlands",
+    "Poland", "Portugal", "Romania", "Slovakia", "Slovenia", "Spain", "Sweden",
+    "United Kingdom", "UK", "USA", "United States", "Canada", "Australia", "Japan",
+    "China", "India", "Brazil", "Mexico", "Switzerland", "Norway", "Israel"
+]
+_COUNTRY_RANK = {country.lower(): rank for rank, country in enumerate(SHEET_COUNTRIES)}
+# Zero-width lookahead so overlapping mentions are all found in one scan
+_COUNTRY_RE = re.compile(
+    '(?=(' + '|'.join(re.escape(country.lower()) for country in SHEET_COUNTRIES) + '))'
+)
+
+
+@lru_cache(maxsize=512)
 def extract_country_from_sheet(sheet_name: str) -> Optional[str]:
     """
     Extract country name from sheet name if it contains a country.
     This is a simple heuristic - can be enhanced with a country list.
     """
-    # Common country names (can be expanded)
-    countries = [
-        "Austria", "Belgium", "Bulgaria", "Croatia", "Cyprus", "Czech Republic",
-        "Denmark", "Estonia", "Finland", "France", "Germany", "Greece", "Hungary",
-        "Ireland", "Italy", "Latvia", "Lithuania", "Luxembourg", "Malta", "Netherlands",
-        "Poland", "Portugal", "Romania", "Slovakia", "Slovenia", "Spain", "Sweden",
-        "United Kingdom", "UK", "USA", "United States", "Canada", "Australia", "Japan",
-        "China", "India", "Brazil", "Mexico", "Switzerland", "Norway", "Israel"
-    ]
-    
-    sheet_lower = sheet_name.lower()
-    for country in countries:
-        if country.lower() in sheet_lower:
-            return country
+    found = {match.group(1) for match in _COUNTRY_RE.finditer(sheet_name.lower())}
+    if not found:
+        return None
     
-    return None
+    return SHEET_COUNTRIES[min(_COUNTRY_RANK[country] for country in found)]
+
+
+def _constant_categorical(value: Optional[str], length: int) -> pd.Categorical:
+    """Categorical of `length` copies of value (all missing if value is empty)."""
+    if not value:
+        return pd.Categorical.from_codes(np.full(length, -1, dtype=np.int8), categories=[])
+    return pd.Categorical.from_codes(np.zeros(length, dtype=np.int8), categories=[value])
 
 
 def clean_dataframe(df: pd.DataFrame, 
                    sheet_name: str = None,
                    source_file: str = None,
-                   column_mapping: Dict = None) -> pd.DataFrame:
+                   column_mapping: Dict = None,
+                   infer_country: bool = True,
+                   map_column_names: bool = True,
+                   ingested_at: Optional[pd.Timestamp] = None) -> pd.DataFrame:
     """
     Main cleaning function that standardizes a DataFrame.
     Now preserves ALL columns - mapping is optional for standardization.
@@ -208,6 +368,10 @@ def clean_dataframe(df: pd.DataFrame,
         sheet_name: Name of the sheet (for country extraction)
         source_file: Source filename (for metadata)
         column_mapping: Column mapping dictionary (optional - for standardization)
+        infer_country: Fill a missing/empty country column from the sheet name
+        map_column_names: Map column name variations to standard names (False if
+            the columns are already mapped)
+        ingested_at: Ingestion timestamp to stamp on every row (now if None)
         
     Returns:
         Cleaned DataFrame with ALL original columns preserved
@@ -216,34 +380,40 @@ def clean_dataframe(df: pd.DataFrame,
         logger.warning("Empty DataFrame provided for cleaning")
         return df
     
-    df = df.copy()
+    # Shallow copy: column assignments below replace columns in this frame only,
+    # so the caller's frame is untouched without copying its data up front
+    df = df.copy(deep=False)
     original_rows = len(df)
     original_columns = list(df.columns)  # Preserve original column list
     
-    # Load column mapping if not provided (optional - for standardization only)
-    if column_mapping is None:
-        column_mapping = load_column_mapping()
-    
-    # Map columns to standard names (this is optional - unmapped columns are preserved)
-    df = map_columns(df, column_mapping)
+    if map_column_names:
+        # Load column mapping if not provided (optional - for standardization only)
+        variation_lookup = None
+        if column_mapping is None:
+            column_mapping, variation_lookup = _load_mapping_cached(*_mapping_cache_key("config/column_mapping.json"))
+        
+        # Map columns to standard names (this is optional - unmapped columns are preserved)
+        df = map_columns(df, column_mapping, variation_lookup)
+        
+        # Log unmapped columns
+        mapped_cols = set(df.columns)
+        unmapped_cols = [col for col in original_columns if col not in mapped_cols]
+        if unmapped_cols:
+            logger.info(f"Preserving unmapped columns: {unmapped_cols}")
     
-    # Log unmapped columns
-    mapped_cols = set(df.columns)
-    unmapped_cols = [col for col in original_columns if col not in mapped_cols]
-    if unmapped_cols:
-        logger.info(f"Preserving unmapped columns: {unmapped_cols}")
+    # Columns already cleaned below are skipped by the final catch-all pass
+    cleaned_columns = set()
     
     # Clean string columns
     string_columns = ['name', 'location', 'description', 'preferred_round', 'notable_companies']
     for col in string_columns:
         if col in df.columns:
-            df[col] = df[col].apply(clean_string)
+            df[col] = clean_string_series(df[col])
+            cleaned_columns.add(col)
     
     # Parse deal size range
     if 'deal_size' in df.columns:
-        ranges = df['deal_size'].apply(parse_range)
-        df['deal_size_min'] = ranges.apply(lambda x: x[0])
-        df['deal_size_max'] = ranges.apply(lambda x: x[1])
+        df['deal_size_min'], df['deal_size_max'] = parse_range_series(df['deal_size'])
         df = df.drop(columns=['deal_size'], errors='ignore')
     elif 'deal_size_min' not in df.columns:
         df['deal_size_min'] = None
@@ -252,31 +422,34 @@ def clean_dataframe(df: pd.DataFrame,
     
     # Parse portfolio value
     if 'portfolio_value' in df.columns:
-        df['portfolio_value'] = df['portfolio_value'].apply(parse_money)
+        df['portfolio_value'] = parse_money_series(df['portfolio_value'])
     
     # Parse exit total value
     if 'exit_total_value' in df.columns:
-        df['exit_total_value'] = df['exit_total_value'].apply(parse_money)
+        df['exit_total_value'] = parse_money_series(df['exit_total_value'])
     
     # Clean website, email, phone columns
     for col in ['website', 'email', 'phone']:
         if col in df.columns:
-            df[col] = df[col].apply(clean_string)
+            df[col] = clean_string_series(df[col])
+            cleaned_columns.add(col)
     
     # Parse founded year as text (keep as string to handle ranges like "2010-2015")
     if 'founded' in df.columns:
-        df['founded'] = df['founded'].apply(clean_string)
+        df['founded'] = clean_string_series(df['founded'])
+        cleaned_columns.add('founded')
     
     # Parse employees (keep as text to handle ranges)
     if 'employees' in df.columns:
-        df['employees'] = df['employees'].apply(clean_string)
+        df['employees'] = clean_string_series(df['employees'])
+        cleaned_columns.add('employees')
     
-    # Parse no_of_rounds as integer
+    # Parse no_of_rounds as integer (round counts are small, so 32 bits is plenty)
     if 'no_of_rounds' in df.columns:
-        df['no_of_rounds'] = pd.to_numeric(df['no_of_rounds'], errors='coerce').astype('Int64')
+        df['no_of_rounds'] = pd.to_numeric(df['no_of_rounds'], errors='coerce').astype('Int32')
     
     # Extract country from sheet name if country column is missing
-    if 'country' not in df.columns or df['country'].isna().all():
+    if infer_country and ('country' not in df.columns or df['country'].isna().all()):
         if sheet_name:
             country = extract_country_from_sheet(sheet_name)
             if country:
@@ -285,17 +458,27 @@ def clean_dataframe(df: pd.DataFrame,
     
     # Clean country column
     if 'country' in df.columns:
-        df['country'] = df['country'].apply(clean_string)
-    
-    # Add source metadata (always add these)
-    df['source_file'] = source_file if source_file else None
-    df['source_sheet'] = sheet_name if sheet_name else None
-    df['ingested_at'] = pd.Timestamp.now()
+        df['country'] = clean_string_series(df['country'])
+        cleaned_columns.add('country')
+    
+    # Add source metadata (always add these); the source columns are constant,
+    # so they're built directly as categoricals holding the value once
+    df['source_file'] = _constant_categorical(source_file, len(df))
+    df['source_sheet'] = _constant_categorical(sheet_name, len(df))
+    df['ingested_at'] = ingested_at if ingested_at is not None else pd.Timestamp.now()
+    
+    # Store low-cardinality text columns as categoricals (codes instead of one string object per row);
+    # done before the row filter below so fewer bytes per row are copied
+    for col in CATEGORICAL_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].astype('category')
     
     # Remove rows where name is missing (low quality)
     # Check if 'name' column exists before trying to drop rows
     if 'name' in df.columns:
-        df = df.dropna(subset=['name'])
+        keep = df['name'].notna().to_numpy()
+        if not keep.all():  # Nothing to drop -> no copy at all
+            df = df.take(np.flatnonzero(keep))
     else:
         # Try to find a name-like column
         name_candidates = [col for col in df.columns if 'name' in col.lower() or 'company' in col.lower() or 'firm' in col.lower()]
@@ -306,11 +489,11 @@ def clean_dataframe(df: pd.DataFrame,
             logger.warning(f"No 'name' column found. Keeping all rows but data may be incomplete.")
     
     # Clean ALL string columns (not just predefined ones)
+    skip_columns = cleaned_columns | NUMERIC_COLUMNS
     for col in df.columns:
-        if df[col].dtype == 'object':  # String columns
-            # Skip if it's already been cleaned or is a special column
-            if col not in ['deal_size_min', 'deal_size_max', 'portfolio_value', 'exit_total_value', 'no_of_rounds']:
-                df[col] = df[col].apply(clean_string)
+        # Skip if it's already been cleaned or is a special column
+        if col not in skip_columns and df[col].dtype == 'object':  # String columns
+            df[col] = clean_string_series(df[col])
     
     # PRESERVE ALL COLUMNS - don't filter to a standard list
     # The database will dynamically add any new columns it encounters
@@ -319,3 +502,70 @@ def clean_dataframe(df: pd.DataFrame,
     
     return df
 
+
+def clean_dataframe_parallel(df: pd.DataFrame,
+                             sheet_name: str = None,
+                             source_file: str = None,
+                             column_mapping: Dict = None,
+                             n_jobs: Optional[int] = None,
+                             chunk_rows: int = PARALLEL_CHUNK_ROWS) -> pd.DataFrame:
+    """
+    Clean a large DataFrame in row chunks across worker processes.
+    Frames of at most chunk_rows rows are cleaned in-process by clean_dataframe.
+    Workers are spawned rather than forked, since callers such as the Streamlit
+    server are multithreaded and forking a threaded process can deadlock.
+    
+    Args:
+        df: Input DataFrame
+        sheet_name: Name of the sheet (for country extraction)
+        source_file: Source filename (for metadata)
+        column_mapping: Column mapping dictionary (optional - for standardization)
+        n_jobs: Number of worker processes (defaults to the CPU count)
+        chunk_rows: Rows per chunk
+        
+    Returns:
+        Cleaned DataFrame, same as clean_dataframe would return
+    """
+    if len(df) <= chunk_rows:
+        return clean_dataframe(df, sheet_name=sheet_name, source_file=source_file,
+                               column_mapping=column_mapping)
+    
+    if column_mapping is None:
+        column_mapping, variation_lookup = _load_mapping_cached(*_mapping_cache_key("config/column_mapping.json"))
+    else:
+        variation_lookup = None
+    
+    # Column names, the sheet-name country and the ingestion time are decided
+    # once for the whole frame rather than per chunk
+    df = map_columns(df, column_mapping, variation_lookup)
+    ingested_at = pd.Timestamp.now()
+    if sheet_name and ('country' not in df.columns or df['country'].isna().all()):
+        country = extract_country_from_sheet(sheet_name)
+        if country:
+            df['country'] = country
+            logger.info(f"Extracted country '{country}' from sheet name: {sheet_name}")
+    
+    chunks = [df.iloc[start:start + chunk_rows] for start in range(0, len(df), chunk_rows)]
+    n_jobs = min(n_jobs or os.cpu_count() or 1, len(chunks))
+    logger.info(f"Cleaning {len(df)} rows in {len(chunks)} chunks across {n_jobs} processes")
+    
+    with ProcessPoolExecutor(max_workers=n_jobs, mp_context=multiprocessing.get_context("spawn")) as executor:
+        futures = [
+            executor.submit(clean_dataframe, chunk, sheet_name=sheet_name, source_file=source_file,
+                            infer_country=False, map_column_names=False, ingested_at=ingested_at)
+            for chunk in chunks
+        ]
+        results = [future.result() for future in futures]
+    
+    # A chunk whose column is all missing must not change that column's dtype (pandas'
+    # current concat behaviour, which warns about a future change)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", FutureWarning)
+        cleaned = pd.concat(results)
+    
+    # Chunks may end up with different categories, which concat turns back into objects
+    for col in CATEGORICAL_COLUMNS:
+        if col in cleaned.columns and not isinstance(cleaned[col].dtype, pd.CategoricalDtype):
+            cleaned[col] = cleaned[col].astype('category')
+    
+    return cleaned
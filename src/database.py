@@ -3,17 +3,22 @@ SQLite Database Operations Module
 Creates and manages the investors database (Supabase-ready schema)
 """
 
+import json
 import sqlite3
+import warnings
+import numpy as np
 import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
-from typing import Optional, List, Dict
+from typing import Optional, List, Dict, Iterator
 from loguru import logger
 from datetime import datetime
 try:
-    from .dynamic_schema import scan_and_update_schema, normalize_column_name
+    from .dynamic_schema import scan_and_update_schema, normalize_column_name, get_all_database_columns
 except ImportError:
     # Handle case where running as script
-    from dynamic_schema import scan_and_update_schema, normalize_column_name
+    from dynamic_schema import scan_and_update_schema, normalize_column_name, get_all_database_columns
 
 
 # SQLite schema (Supabase-ready)
@@ -48,10 +53,132 @@ INDEXES_SQL = [
     "CREATE INDEX IF NOT EXISTS idx_name ON investors(name);",
     "CREATE INDEX IF NOT EXISTS idx_location ON investors(location);",
     "CREATE INDEX IF NOT EXISTS idx_country ON investors(country);",
-    "CREATE INDEX IF NOT EXISTS idx_source_file ON investors(source_file);"
+    "CREATE INDEX IF NOT EXISTS idx_country_name ON investors(country, name);",
+    "CREATE INDEX IF NOT EXISTS idx_source_file ON investors(source_file);",
+    "CREATE INDEX IF NOT EXISTS idx_deal_size_max ON investors(deal_size_max);",
+    "CREATE INDEX IF NOT EXISTS idx_country_deal ON investors(country, deal_size_max);"
 ]
 
 
+# Pandas dtypes for numeric columns when loading investors
+LOAD_DTYPES = {
+    'deal_size_min': 'float64',
+    'deal_size_max': 'float64',
+    'portfolio_value': 'float64',
+    'exit_total_value': 'float64'
+}
+
+# Full-text search index over the searchable text columns.
+# External-content FTS5 table kept in sync with investors by triggers; the
+# trigram tokenizer gives case-insensitive substring matching like LIKE '%x%'.
+FTS_COLUMNS = ['name', 'description', 'location', 'notable_companies']
+
+_FTS_COLS = ', '.join(FTS_COLUMNS)
+_FTS_NEW = ', '.join(f"new.{col}" for col in FTS_COLUMNS)
+_FTS_OLD = ', '.join(f"old.{col}" for col in FTS_COLUMNS)
+
+FTS_SQL = f"""
+CREATE VIRTUAL TABLE IF NOT EXISTS investors_fts USING fts5(
+    {_FTS_COLS},
+    content='investors', content_rowid='id', tokenize='trigram'
+);
+CREATE TRIGGER IF NOT EXISTS investors_fts_ai AFTER INSERT ON investors BEGIN
+    INSERT INTO investors_fts(rowid, {_FTS_COLS}) VALUES (new.id, {_FTS_NEW});
+END;
+CREATE TRIGGER IF NOT EXISTS investors_fts_ad AFTER DELETE ON investors BEGIN
+    INSERT INTO investors_fts(investors_fts, rowid, {_FTS_COLS}) VALUES ('delete', old.id, {_FTS_OLD});
+END;
+CREATE TRIGGER IF NOT EXISTS investors_fts_au AFTER UPDATE ON investors BEGIN
+    INSERT INTO investors_fts(investors_fts, rowid, {_FTS_COLS}) VALUES ('delete', old.id, {_FTS_OLD});
+    INSERT INTO investors_fts(rowid, {_FTS_COLS}) VALUES (new.id, {_FTS_NEW});
+END;
+"""
+
+# The trigram tokenizer cannot match queries shorter than this
+FTS_MIN_QUERY_LENGTH = 3
+
+
+# Investor count plus the sorted distinct countries and source files (as JSON arrays);
+# the DISTINCT subqueries are answered from the country and source_file indexes
+STATISTICS_SQL = """
+SELECT
+    (SELECT COUNT(*) FROM investors),
+    (SELECT json_group_array(country) FROM
+        (SELECT DISTINCT country FROM investors WHERE country IS NOT NULL ORDER BY country)),
+    (SELECT json_group_array(source_file) FROM
+        (SELECT DISTINCT source_file FROM investors WHERE source_file IS NOT NULL ORDER BY source_file))
+"""
+
+# Timestamps left in object columns are bound in the same format as datetime columns,
+# so rows can go to executemany without per-cell conversion
+sqlite3.register_adapter(pd.Timestamp, lambda ts: ts.strftime('%Y-%m-%d %H:%M:%S'))
+
+# Prepared statements kept per connection (sqlite3's default is 128); the search,
+# insert and statistics statements vary with filters and columns
+SQLITE_CACHED_STATEMENTS = 256
+
+# Connections opened by the read helpers, by absolute database path
+_READ_CONNECTIONS: Dict[str, sqlite3.Connection] = {}
+
+# Rows per executemany batch in insert_dataframe; a batch that hits a bad row
+# is rolled back to its savepoint and replayed row by row
+INSERT_CHUNK_ROWS = 10_000
+
+
+# Connection-local tuning for the read helpers; none of these write to the file,
+# so they also work on a read-only database
+READ_PRAGMAS_SQL = [
+    "PRAGMA temp_store=MEMORY;",
+    "PRAGMA cache_size=-65536;",      # 64 MB page cache
+    "PRAGMA mmap_size=268435456;",    # 256 MB memory-mapped I/O
+    "PRAGMA busy_timeout=5000;"       # Wait up to 5 s for another writer's lock
+]
+
+# Connection tuning applied by init_database (bulk ingest, edits, research updates)
+WRITE_PRAGMAS_SQL = [
+    "PRAGMA journal_mode=WAL;",
+    "PRAGMA synchronous=NORMAL;",
+    *READ_PRAGMAS_SQL,
+    "PRAGMA wal_autocheckpoint=1000;" # Checkpoint every 1000 pages so bulk loads don't bloat the WAL
+]
+
+
+def apply_pragmas(conn: sqlite3.Connection) -> None:
+    """
+    Tune a connection for write-heavy workloads.
+    WAL lets readers continue during writes and synchronous=NORMAL avoids a
+    full fsync on every commit; the larger cache keeps the investors B-tree hot.
+    
+    Args:
+        conn: Database connection
+    """
+    for pragma_sql in WRITE_PRAGMAS_SQL:
+        conn.execute(pragma_sql)
+
+
+def _read_connection(db_path: Path) -> sqlite3.Connection:
+    """
+    Shared, tuned connection used by the read helpers when no connection is passed,
+    so repeated queries don't reopen the file and rerun the pragmas.
+    Only READ_PRAGMAS_SQL is applied; the journal mode is left to init_database.
+    """
+    key = str(db_path.resolve())
+    conn = _READ_CONNECTIONS.get(key)
+    if conn is None:
+        conn = sqlite3.connect(key, check_same_thread=False, cached_statements=SQLITE_CACHED_STATEMENTS)
+        for pragma_sql in READ_PRAGMAS_SQL:
+            conn.execute(pragma_sql)
+        _READ_CONNECTIONS[key] = conn
+    return conn
+
+
+def close_read_connections() -> None:
+    """Close the shared read connections (e.g. before replacing the database file)."""
+    while _READ_CONNECTIONS:
+        _, conn = _READ_CONNECTIONS.popitem()
+        conn.close()
+
+
 def migrate_database(conn: sqlite3.Connection) -> None:
     """
     Legacy migration function - now handled by dynamic_schema.
@@ -75,18 +202,15 @@ def get_column_usage_stats(conn: sqlite3.Connection) -> Dict[str, Dict]:
         Dictionary mapping column names to usage statistics
     """
     cursor = conn.cursor()
-    cursor.execute("PRAGMA table_info(investors)")
-    columns = [row[1] for row in cursor.fetchall()]
+    columns = [col for col in get_all_database_columns(conn) if col != 'id']
     
-    stats = {}
-    total_rows = cursor.execute("SELECT COUNT(*) FROM investors").fetchone()[0]
+    # Count the non-null values of every column in a single table scan
+    counts_sql = ''.join(f", COUNT(CASE WHEN \"{col}\" IS NOT NULL AND \"{col}\" != '' THEN 1 END)"
+                         for col in columns)
+    total_rows, *non_null_counts = cursor.execute(f"SELECT COUNT(*){counts_sql} FROM investors").fetchone()
     
-    for col in columns:
-        if col == 'id':
-            continue
-        # Count non-null values
-        cursor.execute(f"SELECT COUNT(*) FROM investors WHERE {col} IS NOT NULL AND {col} != ''")
-        non_null_count = cursor.fetchone()[0]
+    stats = {}
+    for col, non_null_count in zip(columns, non_null_counts):
         usage_percent = (non_null_count / total_rows * 100) if total_rows > 0 else 0
         
         stats[col] = {
@@ -99,18 +223,21 @@ def get_column_usage_stats(conn: sqlite3.Connection) -> Dict[str, Dict]:
     return stats
 
 
-def get_unused_columns(conn: sqlite3.Connection, min_usage_percent: float = 0.0) -> List[str]:
+def get_unused_columns(conn: sqlite3.Connection, min_usage_percent: float = 0.0,
+                       stats: Optional[Dict[str, Dict]] = None) -> List[str]:
     """
     Get list of columns that are unused (all NULL or below usage threshold).
     
     Args:
         conn: Database connection
         min_usage_percent: Minimum usage percentage to consider a column "used" (0-100)
+        stats: Precomputed get_column_usage_stats() result, to avoid rescanning
         
     Returns:
         List of unused column names
     """
-    stats = get_column_usage_stats(conn)
+    if stats is None:
+        stats = get_column_usage_stats(conn)
     unused = []
     
     for col, stat in stats.items():
@@ -120,11 +247,100 @@ def get_unused_columns(conn: sqlite3.Connection, min_usage_percent: float = 0.0)
     return unused
 
 
+def _drop_columns_in_place(conn: sqlite3.Connection, columns: List[str]) -> bool:
+    """
+    Drop columns with ALTER TABLE ... DROP COLUMN (SQLite 3.35+), in one transaction.
+    Indexes on the columns are dropped first (remove_unused_columns recreates the
+    ones that still apply).
+    
+    Args:
+        conn: Database connection
+        columns: Existing columns to drop
+        
+    Returns:
+        True if all columns were dropped, False if nothing changed (e.g. a column
+        is part of a UNIQUE constraint or used by a trigger)
+    """
+    index_names = [row[1] for row in conn.execute("PRAGMA index_list(investors)").fetchall() if row[3] == 'c']
+    indexes_to_drop = [
+        index_name for index_name in index_names
+        if any(row[2] in columns for row in conn.execute(f"PRAGMA index_info('{index_name}')"))
+    ]
+    
+    if not conn.in_transaction:
+        conn.execute("BEGIN")
+    try:
+        for index_name in indexes_to_drop:
+            conn.execute(f'DROP INDEX "{index_name}"')
+        for col in columns:
+            conn.execute(f'ALTER TABLE investors DROP COLUMN "{col}"')
+    except sqlite3.OperationalError as e:
+        conn.rollback()
+        logger.info(f"Cannot drop columns in place ({e}), rebuilding the table instead")
+        return False
+    
+    conn.commit()
+    return True
+
+
+def _rebuild_without_columns(conn: sqlite3.Connection, columns_to_keep: List[str]) -> None:
+    """
+    Recreate the investors table with only columns_to_keep, in one transaction.
+    The one-off copy runs with synchronous=OFF; a failed rebuild is rolled back.
+    
+    Args:
+        conn: Database connection
+        columns_to_keep: Columns of the new table, in order
+    """
+    # Step 1: Create new table with only columns we want to keep
+    columns_def = []
+    for col in columns_to_keep:
+        if col == 'id':
+            columns_def.append(f"{col} INTEGER PRIMARY KEY AUTOINCREMENT")
+        elif col == 'name':
+            columns_def.append(f"{col} TEXT NOT NULL")
+        elif col in ['deal_size_min', 'deal_size_max', 'portfolio_value', 'exit_total_value']:
+            columns_def.append(f"{col} REAL")
+        elif col == 'no_of_rounds':
+            columns_def.append(f"{col} INTEGER")
+        elif col == 'ingested_at':
+            columns_def.append(f"{col} DATETIME DEFAULT CURRENT_TIMESTAMP")
+        else:
+            columns_def.append(f"{col} TEXT")
+    
+    new_table_sql = f"""
+    CREATE TABLE investors_new (
+        {', '.join(columns_def)}
+    )
+    """
+    
+    synchronous = conn.execute("PRAGMA synchronous").fetchone()[0]
+    conn.execute("PRAGMA synchronous=OFF")
+    try:
+        if not conn.in_transaction:
+            conn.execute("BEGIN")
+        conn.execute(new_table_sql)
+        
+        # Step 2: Copy data (only columns that exist in both)
+        columns_str = ', '.join(columns_to_keep)
+        conn.execute(f"INSERT INTO investors_new ({columns_str}) SELECT {columns_str} FROM investors")
+        
+        # Step 3: Drop old table and rename new one
+        conn.execute("DROP TABLE investors")
+        conn.execute("ALTER TABLE investors_new RENAME TO investors")
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.execute(f"PRAGMA synchronous={synchronous}")
+
+
 def remove_unused_columns(conn: sqlite3.Connection, columns_to_remove: List[str], 
                          preserve_essential: bool = True) -> int:
     """
     Remove unused columns from the database.
-    Note: SQLite doesn't support DROP COLUMN directly, so we need to recreate the table.
+    Uses ALTER TABLE ... DROP COLUMN on SQLite 3.35+, and recreates the table otherwise.
     
     Args:
         conn: Database connection
@@ -138,6 +354,8 @@ def remove_unused_columns(conn: sqlite3.Connection, columns_to_remove: List[str]
         return 0
     
     essential_columns = {'id', 'name', 'location', 'source_file', 'source_sheet', 'ingested_at'}
+    # Columns indexed by the full-text search table must stay in place
+    essential_columns.update(FTS_COLUMNS)
     
     # Filter out essential columns if preserve_essential is True
     if preserve_essential:
@@ -147,11 +365,8 @@ def remove_unused_columns(conn: sqlite3.Connection, columns_to_remove: List[str]
         logger.info("No removable columns (all are essential)")
         return 0
     
-    cursor = conn.cursor()
-    
     # Get all current columns
-    cursor.execute("PRAGMA table_info(investors)")
-    all_columns = [row[1] for row in cursor.fetchall()]
+    all_columns = get_all_database_columns(conn)
     
     # Get columns to keep
     columns_to_keep = [col for col in all_columns if col not in columns_to_remove]
@@ -162,62 +377,84 @@ def remove_unused_columns(conn: sqlite3.Connection, columns_to_remove: List[str]
     
     logger.info(f"Removing {len(columns_to_remove)} unused columns: {columns_to_remove}")
     
-    # SQLite doesn't support DROP COLUMN, so we need to recreate the table
-    # This is a complex operation - we'll create a new table, copy data, then replace
+    # SQLite 3.35+ drops columns in place (no copy of the table); otherwise, or if
+    # a column can't be dropped that way, recreate the table without them
+    removed = [col for col in all_columns if col in columns_to_remove]
+    if not (sqlite3.sqlite_version_info >= (3, 35, 0) and _drop_columns_in_place(conn, removed)):
+        _rebuild_without_columns(conn, columns_to_keep)
     
-    # Step 1: Create new table with only columns we want to keep
-    columns_def = []
-    for col in columns_to_keep:
-        if col == 'id':
-            columns_def.append(f"{col} INTEGER PRIMARY KEY AUTOINCREMENT")
-        elif col == 'name':
-            columns_def.append(f"{col} TEXT NOT NULL")
-        elif col in ['deal_size_min', 'deal_size_max', 'portfolio_value', 'exit_total_value']:
-            columns_def.append(f"{col} REAL")
-        elif col == 'no_of_rounds':
-            columns_def.append(f"{col} INTEGER")
-        elif col == 'ingested_at':
-            columns_def.append(f"{col} DATETIME DEFAULT CURRENT_TIMESTAMP")
-        else:
-            columns_def.append(f"{col} TEXT")
+    # Recreate indexes and full-text search triggers (dropped along with a rebuilt table)
+    finalize_indexes(conn)
+    logger.info(f"Successfully removed {len(columns_to_remove)} columns")
     
-    # Create new table
-    new_table_sql = f"""
-    CREATE TABLE investors_new (
-        {', '.join(columns_def)}
-    )
+    return len(columns_to_remove)
+
+
+def create_fts_index(conn: sqlite3.Connection) -> bool:
     """
+    Create the FTS5 search index and its sync triggers if missing.
+    A newly created index is populated from the existing investors rows.
     
-    cursor.execute(new_table_sql)
+    Args:
+        conn: Database connection
+        
+    Returns:
+        True if the index is available, False if FTS5 is unsupported
+    """
+    cursor = conn.cursor()
+    cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='investors_fts'")
+    fts_exists = cursor.fetchone() is not None
     
-    # Step 2: Copy data (only columns that exist in both)
-    columns_str = ', '.join(columns_to_keep)
-    cursor.execute(f"INSERT INTO investors_new ({columns_str}) SELECT {columns_str} FROM investors")
+    try:
+        conn.executescript(FTS_SQL)
+    except sqlite3.OperationalError as e:
+        logger.warning(f"Full-text search index unavailable, falling back to LIKE search: {e}")
+        return False
+    
+    if not fts_exists:
+        conn.execute("INSERT INTO investors_fts(investors_fts) VALUES ('rebuild')")
+        logger.info("Built full-text search index")
     
-    # Step 3: Drop old table and rename new one
-    cursor.execute("DROP TABLE investors")
-    cursor.execute("ALTER TABLE investors_new RENAME TO investors")
+    return True
+
+
+def finalize_indexes(conn: sqlite3.Connection) -> None:
+    """
+    Create the secondary indexes and the full-text search index if missing.
+    Run after a bulk load into a database opened with create_indexes=False, so
+    each index is built in one pass instead of updated on every insert.
     
-    # Step 4: Recreate indexes
+    Args:
+        conn: Database connection
+    """
+    # Skip any index whose column was removed as unused
     for index_sql in INDEXES_SQL:
         try:
-            cursor.execute(index_sql)
-        except:
-            pass
+            conn.execute(index_sql)
+        except sqlite3.OperationalError as e:
+            logger.debug(f"Skipping index: {e}")
     
+    create_fts_index(conn)
     conn.commit()
-    logger.info(f"Successfully removed {len(columns_to_remove)} columns")
-    
-    return len(columns_to_remove)
 
 
-def init_database(db_path: str = "data/investors.db") -> sqlite3.Connection:
+def init_database(db_path: str = "data/investors.db",
+                  check_same_thread: bool = True,
+                  create_indexes: bool = True) -> sqlite3.Connection:
     """
     Initialize the database with schema and indexes.
     Also migrates existing databases to add new columns.
+    The connection is tuned with WRITE_PRAGMAS_SQL; in WAL mode SQLite keeps
+    investors.db-wal / investors.db-shm files next to the database until the
+    last connection closes (commit_database.sh checkpoints before committing).
     
     Args:
         db_path: Path to SQLite database file
+        check_same_thread: Passed to sqlite3.connect; set False for a
+            connection shared across threads (e.g. Streamlit reruns)
+        create_indexes: Create missing indexes now; pass False before a bulk load
+            and call finalize_indexes() afterwards. UNIQUE(name, location) is part
+            of the table and is enforced either way.
         
     Returns:
         Database connection
@@ -225,8 +462,12 @@ def init_database(db_path: str = "data/investors.db") -> sqlite3.Connection:
     db_path = Path(db_path)
     db_path.parent.mkdir(parents=True, exist_ok=True)
     
-    conn = sqlite3.connect(str(db_path))
+    conn = sqlite3.connect(str(db_path), check_same_thread=check_same_thread,
+                           cached_statements=SQLITE_CACHED_STATEMENTS)
+    apply_pragmas(conn)
     conn.execute("PRAGMA foreign_keys = ON")
+    # INSERT OR REPLACE only fires the FTS delete trigger with recursive triggers on
+    conn.execute("PRAGMA recursive_triggers = ON")
     
     # Check if table exists
     cursor = conn.cursor()
@@ -242,9 +483,8 @@ def init_database(db_path: str = "data/investors.db") -> sqlite3.Connection:
         # No need to run migration (columns are added when data is inserted)
         logger.debug(f"Database exists at {db_path}, using dynamic schema")
     
-    # Create indexes
-    for index_sql in INDEXES_SQL:
-        conn.execute(index_sql)
+    if create_indexes:
+        finalize_indexes(conn)
     
     conn.commit()
     logger.info(f"Database initialized at {db_path}")
@@ -252,6 +492,62 @@ def init_database(db_path: str = "data/investors.db") -> sqlite3.Connection:
     return conn
 
 
+def _format_datetimes(series: pd.Series) -> pd.Series:
+    """
+    Format a datetime Series as 'YYYY-MM-DD HH:MM:SS' strings (None for NaT).
+    Each distinct timestamp is formatted once, so a constant column such as the
+    ingested_at stamp from clean_dataframe costs a single strftime.
+    
+    Args:
+        series: Datetime Series
+        
+    Returns:
+        Object Series of strings
+    """
+    codes, uniques = pd.factorize(series)
+    if len(uniques) == 0:
+        return pd.Series([None] * len(series), index=series.index, dtype=object)
+    formatted = np.asarray(uniques.strftime('%Y-%m-%d %H:%M:%S'), dtype=object)
+    return pd.Series(np.where(codes >= 0, formatted[codes], None), index=series.index, dtype=object)
+
+
+@lru_cache(maxsize=32)
+def _insert_sql(columns: tuple, replace: bool) -> str:
+    """INSERT OR REPLACE / INSERT OR IGNORE statement for these investors columns."""
+    placeholders = ', '.join(['?' for _ in columns])
+    verb = "INSERT OR REPLACE" if replace else "INSERT OR IGNORE"
+    return f"{verb} INTO investors ({', '.join(columns)}) VALUES ({placeholders})"
+
+
+def _chunk_records(df: pd.DataFrame, start: int) -> list:
+    """
+    Plain row tuples for one insert batch of df, starting at row position start.
+    Missing values (NaN, NaT, pd.NA) become None in one vectorized pass.
+    """
+    values_df = df.iloc[start:start + INSERT_CHUNK_ROWS].astype(object)
+    values_df = values_df.where(values_df.notna(), None)
+    return list(values_df.itertuples(index=False, name=None))
+
+
+def _has_unique_name_location(conn: sqlite3.Connection) -> bool:
+    """
+    Check whether investors still enforces UNIQUE(name, location).
+    Tables rebuilt by remove_unused_columns don't carry the constraint.
+    
+    Args:
+        conn: Database connection
+        
+    Returns:
+        True if a unique index on exactly (name, location) exists
+    """
+    for _, index_name, is_unique, *_ in conn.execute("PRAGMA index_list(investors)").fetchall():
+        if is_unique:
+            index_columns = [row[2] for row in conn.execute(f"PRAGMA index_info('{index_name}')")]
+            if index_columns == ['name', 'location']:
+                return True
+    return False
+
+
 def insert_dataframe(conn: sqlite3.Connection, df: pd.DataFrame, 
                     replace: bool = False) -> int:
     """
@@ -287,61 +583,77 @@ def insert_dataframe(conn: sqlite3.Connection, df: pd.DataFrame,
         insert_df = insert_df.rename(columns=column_mapping)
         logger.debug(f"Normalized columns: {column_mapping}")
     
-    # Convert to SQL-compatible types
-    for col in ['deal_size_min', 'deal_size_max', 'portfolio_value']:
-        if col in insert_df.columns:
-            insert_df[col] = pd.to_numeric(insert_df[col], errors='coerce')
-    
-    if 'no_of_rounds' in insert_df.columns:
+    # Drop rows INSERT OR IGNORE would reject anyway (mostly re-ingested rows), so
+    # they cost a set lookup instead of a unique-index probe and rollback each.
+    # NULL locations never conflict in SQLite, so only non-null keys are loaded.
+    if not replace and {'name', 'location'} <= set(insert_df.columns) and _has_unique_name_location(conn):
+        existing_keys = set(conn.execute("SELECT name, location FROM investors WHERE location IS NOT NULL"))
+        is_new = [key not in existing_keys for key in zip(insert_df['name'], insert_df['location'])]
+        if not all(is_new):
+            insert_df = insert_df[is_new]
+            logger.debug(f"Skipping {len(is_new) - len(insert_df)} rows already in the database")
+        if insert_df.empty:
+            logger.info("Inserted 0 rows into database")
+            return 0
+    
+    # Convert to SQL-compatible types (cleaned frames already hold numbers, so only
+    # columns that aren't numeric yet are coerced, in one block)
+    numeric_cols = [col for col in ['deal_size_min', 'deal_size_max', 'portfolio_value']
+                    if col in insert_df.columns and not pd.api.types.is_numeric_dtype(insert_df[col])]
+    if numeric_cols:
+        insert_df[numeric_cols] = insert_df[numeric_cols].apply(pd.to_numeric, errors='coerce')
+    
+    if 'no_of_rounds' in insert_df.columns and not pd.api.types.is_integer_dtype(insert_df['no_of_rounds']):
         insert_df['no_of_rounds'] = pd.to_numeric(insert_df['no_of_rounds'], errors='coerce').astype('Int64')
     
     # Convert datetime columns to strings for SQLite compatibility
     for col in insert_df.columns:
         if insert_df[col].dtype == 'datetime64[ns]' or pd.api.types.is_datetime64_any_dtype(insert_df[col]):
-            insert_df[col] = insert_df[col].dt.strftime('%Y-%m-%d %H:%M:%S')
+            insert_df[col] = _format_datetimes(insert_df[col])
         elif 'ingested_at' in col and insert_df[col].dtype == 'object':
             # Try to convert if it's a datetime string
             try:
-                insert_df[col] = pd.to_datetime(insert_df[col]).dt.strftime('%Y-%m-%d %H:%M:%S')
+                insert_df[col] = _format_datetimes(pd.to_datetime(insert_df[col]))
             except:
                 pass
     
     # Use direct SQL insertion to handle UNIQUE constraints and data type conversion
     # This is more reliable than pandas' to_sql with custom methods
     try:
-        cursor = conn.cursor()
-        placeholders = ', '.join(['?' for _ in insert_df.columns])
-        columns = ', '.join(insert_df.columns)
+        sql = _insert_sql(tuple(insert_df.columns), replace)
         
-        if replace:
-            sql = f"INSERT OR REPLACE INTO investors ({columns}) VALUES ({placeholders})"
-        else:
-            sql = f"INSERT OR IGNORE INTO investors ({columns}) VALUES ({placeholders})"
+        # All batches go into one write transaction (one journal sync for the whole insert)
+        cursor = conn.cursor()
+        if not conn.in_transaction:
+            cursor.execute("BEGIN IMMEDIATE")
         
         inserted = 0
-        for _, row in insert_df.iterrows():
-            try:
-                values = []
-                for col in insert_df.columns:
-                    val = row[col]
-                    # Convert to SQLite-compatible types
-                    if pd.isna(val):
-                        values.append(None)
-                    elif isinstance(val, pd.Timestamp):
-                        values.append(val.strftime('%Y-%m-%d %H:%M:%S'))
-                    elif hasattr(pd, 'NaT') and (val is pd.NaT or isinstance(val, type(pd.NaT))):
-                        values.append(None)
-                    elif isinstance(val, (int, float)) and pd.isna(val):
-                        values.append(None)
-                    else:
-                        values.append(val)
+        # The next batch's tuples are built in a helper thread while this one is
+        # written; all writes stay on the calling thread's connection
+        with ThreadPoolExecutor(max_workers=1) as preparer:
+            pending = preparer.submit(_chunk_records, insert_df, 0)
+            for start in range(0, len(insert_df), INSERT_CHUNK_ROWS):
+                chunk = pending.result()
+                if start + INSERT_CHUNK_ROWS < len(insert_df):
+                    pending = preparer.submit(_chunk_records, insert_df, start + INSERT_CHUNK_ROWS)
                 
-                cursor.execute(sql, values)
-                if cursor.rowcount > 0:
-                    inserted += 1
-            except (sqlite3.IntegrityError, sqlite3.OperationalError) as e:
-                logger.debug(f"Skipping row due to error: {e}")
-                continue
+                cursor.execute("SAVEPOINT insert_chunk")
+                try:
+                    cursor.executemany(sql, chunk)
+                    inserted += cursor.rowcount
+                except (sqlite3.IntegrityError, sqlite3.OperationalError) as e:
+                    # A single bad row aborts executemany; redo this batch row by row and skip only the bad ones
+                    logger.debug(f"Batch insert failed ({e}), retrying {len(chunk)} rows one by one")
+                    cursor.execute("ROLLBACK TO insert_chunk")
+                    for values in chunk:
+                        try:
+                            cursor.execute(sql, values)
+                            if cursor.rowcount > 0:
+                                inserted += 1
+                        except (sqlite3.IntegrityError, sqlite3.OperationalError) as e:
+                            logger.debug(f"Skipping row due to error: {e}")
+                            continue
+                cursor.execute("RELEASE insert_chunk")
         
         conn.commit()
         logger.info(f"Inserted {inserted} rows into database")
@@ -352,59 +664,138 @@ def insert_dataframe(conn: sqlite3.Connection, df: pd.DataFrame,
         conn.rollback()
         # Fallback to row-by-row insertion
         inserted = 0
-        cursor = conn.cursor() if hasattr(conn, 'cursor') else conn
-        for _, row in insert_df.iterrows():
+        cursor = conn.cursor()
+        sql = _insert_sql(tuple(insert_df.columns), False)
+        # Object columns hold plain Python scalars (numpy integers would bind as blobs)
+        for row in insert_df.astype(object).itertuples(index=False, name=None):
             try:
-                row_dict = row.to_dict()
-                # Convert values to SQLite-compatible types
-                values = []
-                for key, val in row_dict.items():
-                    if pd.isna(val):
-                        values.append(None)
-                    elif isinstance(val, pd.Timestamp):
-                        values.append(val.strftime('%Y-%m-%d %H:%M:%S'))
-                    elif hasattr(pd, 'NaT') and (val is pd.NaT or isinstance(val, type(pd.NaT))):
-                        values.append(None)
-                    else:
-                        values.append(val)
-                
-                placeholders = ', '.join(['?' for _ in row_dict.keys()])
-                columns = ', '.join(row_dict.keys())
-                sql = f"INSERT OR IGNORE INTO investors ({columns}) VALUES ({placeholders})"
+                # NaN/NaT are the only values unequal to themselves; pd.NA is matched by identity
+                values = [None if val is pd.NA or val != val else val for val in row]
                 cursor.execute(sql, values)
-                inserted += 1
+                if cursor.rowcount > 0:
+                    inserted += 1
             except (sqlite3.IntegrityError, sqlite3.OperationalError) as e:
                 logger.debug(f"Skipping row due to error: {e}")
                 continue
-        if hasattr(conn, 'commit'):
-            conn.commit()
+        conn.commit()
         logger.info(f"Inserted {inserted} rows (fallback method)")
         return inserted
 
 
-def load_all_investors(db_path: str = "data/investors.db") -> pd.DataFrame:
+def load_all_investors(db_path: str = "data/investors.db",
+                       columns: Optional[List[str]] = None,
+                       dtype: Optional[Dict[str, str]] = None,
+                       conn: Optional[sqlite3.Connection] = None,
+                       chunksize: Optional[int] = None,
+                       ids: Optional[List[int]] = None) -> pd.DataFrame:
     """
     Load all investors from the database.
     
     Args:
         db_path: Path to SQLite database file
+        columns: Only load these columns (missing ones are skipped); all if None
+        dtype: Extra column dtypes, applied on top of LOAD_DTYPES
+        conn: Existing connection to reuse (left open); db_path is ignored if given
+        chunksize: Fetch this many rows at a time instead of the whole result at
+            once, bounding the raw row buffer on large tables
+        ids: Only load the investors with these ids; all if None
         
     Returns:
         DataFrame with all investors
     """
-    db_path = Path(db_path)
-    if not db_path.exists():
-        logger.warning(f"Database not found at {db_path}, returning empty DataFrame")
-        return pd.DataFrame()
+    if conn is None:
+        db_path = Path(db_path)
+        if not db_path.exists():
+            logger.warning(f"Database not found at {db_path}, returning empty DataFrame")
+            return pd.DataFrame()
+        conn = _read_connection(db_path)
+    
+    if columns is None:
+        select_sql = "*"
+    else:
+        existing = set(get_all_database_columns(conn))
+        select_sql = ', '.join(f'"{col}"' for col in columns if col in existing)
+    
+    # The ids go in as one JSON array, so any number of them fits in one parameter
+    where_sql, params = "", None
+    if ids is not None:
+        where_sql = "WHERE id IN (SELECT value FROM json_each(?)) "
+        params = [json.dumps([int(investor_id) for investor_id in ids])]
+    
+    # ORDER BY name is served by idx_name (index scan, no temp sort)
+    sql = f"SELECT {select_sql} FROM investors {where_sql}ORDER BY name"
+    if chunksize:
+        # A chunk whose column is all NULL must not turn that column into objects
+        # (pandas' current concat behaviour, which warns about a future change)
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", FutureWarning)
+            df = pd.concat(pd.read_sql_query(sql, conn, params=params, chunksize=chunksize), ignore_index=True)
+    else:
+        df = pd.read_sql_query(sql, conn, params=params)
     
-    conn = sqlite3.connect(str(db_path))
-    df = pd.read_sql_query("SELECT * FROM investors ORDER BY name", conn)
-    conn.close()
+    # Pin known numeric columns to float64 so all-NULL columns don't fall back to object
+    dtypes = {**LOAD_DTYPES, **(dtype or {})}
+    dtypes = {col: col_type for col, col_type in dtypes.items() if col in df.columns}
+    try:
+        df = df.astype(dtypes)
+    except (ValueError, TypeError) as e:
+        logger.warning(f"Could not apply column dtypes, keeping inferred types: {e}")
     
     logger.info(f"Loaded {len(df)} investors from database")
     return df
 
 
+def _has_fts_index(conn: sqlite3.Connection) -> bool:
+    """Whether the investors_fts full-text search table exists."""
+    cursor = conn.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='investors_fts'")
+    return cursor.fetchone() is not None
+
+
+def _fts_phrase(search_text: str) -> str:
+    """Quote text as a single FTS5 phrase so operators in it are matched literally."""
+    return '"' + search_text.replace('"', '""') + '"'
+
+
+def search_investor_ids(db_path: str = "data/investors.db",
+                        search_text: str = "",
+                        conn: Optional[sqlite3.Connection] = None) -> List[int]:
+    """
+    Full-text search over name, description, location and notable companies.
+    Uses the FTS5 index when possible, otherwise falls back to LIKE matching.
+    
+    Args:
+        db_path: Path to SQLite database file
+        search_text: Text to search for (case-insensitive substring)
+        conn: Existing connection to reuse (left open); db_path is ignored if given
+        
+    Returns:
+        List of matching investor ids
+    """
+    search_text = search_text.strip()
+    if not search_text:
+        return []
+    
+    if conn is None:
+        db_path = Path(db_path)
+        if not db_path.exists():
+            return []
+        conn = _read_connection(db_path)
+    
+    cursor = conn.cursor()
+    
+    if len(search_text) >= FTS_MIN_QUERY_LENGTH and _has_fts_index(conn):
+        cursor.execute("SELECT rowid FROM investors_fts WHERE investors_fts MATCH ?", (_fts_phrase(search_text),))
+    else:
+        conditions = ' OR '.join(f"{col} LIKE ?" for col in FTS_COLUMNS)
+        cursor.execute(f"SELECT id FROM investors WHERE {conditions}",
+                       [f"%{search_text}%"] * len(FTS_COLUMNS))
+    
+    ids = [row[0] for row in cursor.fetchall()]
+    
+    logger.debug(f"Full-text search for '{search_text}' matched {len(ids)} investors")
+    return ids
+
+
 def search_investors(db_path: str = "data/investors.db",
                     name: Optional[str] = None,
                     country: Optional[str] = None,
@@ -431,8 +822,10 @@ def search_investors(db_path: str = "data/investors.db",
     if not db_path.exists():
         return pd.DataFrame()
     
-    conn = sqlite3.connect(str(db_path))
+    conn = _read_connection(db_path)
     
+    # Each filter combination yields the same SQL text every time, so the connection's
+    # statement cache reuses its prepared plan (and each plan can still use the indexes)
     query = "SELECT * FROM investors WHERE 1=1"
     params = []
     
@@ -457,58 +850,60 @@ def search_investors(db_path: str = "data/investors.db",
         params.append(max_deal_size)
     
     if search_text:
-        query += " AND (name LIKE ? OR description LIKE ? OR location LIKE ? OR notable_companies LIKE ?)"
-        search_param = f"%{search_text}%"
-        params.extend([search_param] * 4)
+        if len(search_text) >= FTS_MIN_QUERY_LENGTH and _has_fts_index(conn):
+            # Trigram index lookup instead of four leading-wildcard LIKE scans
+            query += " AND id IN (SELECT rowid FROM investors_fts WHERE investors_fts MATCH ?)"
+            params.append(_fts_phrase(search_text))
+        else:
+            query += " AND (name LIKE ? OR description LIKE ? OR location LIKE ? OR notable_companies LIKE ?)"
+            search_param = f"%{search_text}%"
+            params.extend([search_param] * 4)
     
     query += " ORDER BY name"
     
-    df = pd.read_sql_query(query, conn, params=params)
-    conn.close()
+    # Small filtered results: build the frame straight from the rows, skipping
+    # read_sql_query's wrapper layer (same result as its from_records call)
+    cursor = conn.execute(query, params)
+    columns = [description[0] for description in cursor.description]
+    df = pd.DataFrame.from_records(cursor.fetchall(), columns=columns, coerce_float=True)
     
     logger.info(f"Search returned {len(df)} results")
     return df
 
 
-def get_statistics(db_path: str = "data/investors.db") -> dict:
+def get_statistics(db_path: str = "data/investors.db",
+                   conn: Optional[sqlite3.Connection] = None) -> dict:
     """
     Get database statistics.
     
     Args:
         db_path: Path to SQLite database file
+        conn: Existing connection to reuse (left open); db_path is ignored if given
         
     Returns:
         Dictionary with statistics
     """
-    db_path = Path(db_path)
-    if not db_path.exists():
-        return {
-            "total_investors": 0,
-            "countries": [],
-            "sources": []
-        }
-    
-    conn = sqlite3.connect(str(db_path))
+    if conn is None:
+        db_path = Path(db_path)
+        if not db_path.exists():
+            return {
+                "total_investors": 0,
+                "countries": [],
+                "sources": []
+            }
+        conn = _read_connection(db_path)
     
     stats = {}
     
-    # Total count
-    cursor = conn.execute("SELECT COUNT(*) FROM investors")
-    stats["total_investors"] = cursor.fetchone()[0]
-    
-    # Countries
-    cursor = conn.execute("SELECT DISTINCT country FROM investors WHERE country IS NOT NULL ORDER BY country")
-    stats["countries"] = [row[0] for row in cursor.fetchall()]
-    
-    # Source files
-    cursor = conn.execute("SELECT DISTINCT source_file FROM investors WHERE source_file IS NOT NULL ORDER BY source_file")
-    stats["sources"] = [row[0] for row in cursor.fetchall()]
+    # Total count, countries and source files in one round trip
+    total, countries, sources = conn.execute(STATISTICS_SQL).fetchone()
+    stats["total_investors"] = total
+    stats["countries"] = json.loads(countries)
+    stats["sources"] = json.loads(sources)
     
     # Column usage stats
     stats["column_usage"] = get_column_usage_stats(conn)
     
-    conn.close()
-    
     return stats
 
 
@@ -524,51 +919,92 @@ def update_investor_from_dataframe(conn: sqlite3.Connection, df: pd.DataFrame) -
         
     Returns:
         Number of records updated
+        
+    Raises:
+        sqlite3.Error: If the update fails (e.g. an edit would duplicate another
+            investor's name and location); the transaction is rolled back first
     """
     if df.empty or 'id' not in df.columns:
         return 0
     
-    cursor = conn.cursor()
-    updated_count = 0
-    
     # Get all column names from the database
-    cursor.execute("PRAGMA table_info(investors)")
-    db_columns = {row[1] for row in cursor.fetchall()}
+    db_columns = set(get_all_database_columns(conn))
+    columns = [col for col in df.columns if col != 'id' and col in db_columns]
+    
+    # Rows with an id and at least one value to write
+    rows = df[df['id'].notna()]
+    if columns:
+        rows = rows[rows[columns].notna().any(axis=1).to_numpy()]
+    if not columns or rows.empty:
+        logger.info("Updated 0 investor records from DataFrame")
+        return 0
     
-    for _, row in df.iterrows():
-        investor_id = row['id']
-        if pd.isna(investor_id):
-            continue
-        
-        updates = []
-        params = []
-        
-        # Update all non-null, non-id columns that exist in the database
-        for col in df.columns:
-            if col == 'id' or col not in db_columns:
-                continue
-            
-            value = row[col]
-            # Only update if value is not null/NaN
-            if pd.notna(value):
-                updates.append(f"{col} = ?")
-                params.append(value)
+    values_df = rows[['id'] + columns].astype(object)
+    values_df = values_df.where(values_df.notna(), None)
+    
+    # Stage the rows in a temp table and apply them in one UPDATE (UPDATE ... FROM
+    # needs SQLite 3.33; older versions look each value up with a subquery).
+    # COALESCE keeps the current value wherever the DataFrame has a null
+    if sqlite3.sqlite_version_info >= (3, 33, 0):
+        assignments = ', '.join(f"{col} = COALESCE(u.{col}, investors.{col})" for col in columns)
+        update_sql = (f"UPDATE investors SET {assignments} "
+                      f"FROM temp.investor_updates AS u WHERE investors.id = u.id")
+    else:
+        assignments = ', '.join(
+            f"{col} = COALESCE((SELECT u.{col} FROM temp.investor_updates AS u WHERE u.id = investors.id), {col})"
+            for col in columns
+        )
+        update_sql = (f"UPDATE investors SET {assignments} "
+                      f"WHERE id IN (SELECT id FROM temp.investor_updates)")
+    
+    cursor = conn.cursor()
+    try:
+        cursor.execute("DROP TABLE IF EXISTS temp.investor_updates")
+        cursor.execute(f"CREATE TEMP TABLE investor_updates (id INTEGER PRIMARY KEY, {', '.join(columns)})")
+        placeholders = ', '.join(['?'] * (len(columns) + 1))
+        cursor.executemany(f"INSERT OR REPLACE INTO temp.investor_updates VALUES ({placeholders})",
+                           values_df.itertuples(index=False, name=None))
         
-        if updates:
-            params.append(investor_id)
-            sql = f"UPDATE investors SET {', '.join(updates)} WHERE id = ?"
-            try:
-                cursor.execute(sql, params)
-                if cursor.rowcount > 0:
-                    updated_count += 1
-            except Exception as e:
-                logger.error(f"Error updating investor {investor_id}, column updates: {updates}: {e}")
+        # A row whose new (name, location) is already taken fails the whole update
+        cursor.execute(update_sql)
+        updated_count = cursor.rowcount
+        cursor.execute("DROP TABLE temp.investor_updates")
+        conn.commit()
+    except Exception as e:
+        logger.error(f"Error updating investors, columns {columns}: {e}")
+        conn.rollback()
+        raise
     
-    conn.commit()
     logger.info(f"Updated {updated_count} investor records from DataFrame")
     return updated_count
 
 
+def dump_database(conn: sqlite3.Connection) -> Iterator[str]:
+    """
+    Yield SQL statements that recreate the database, like the sqlite3 CLI's .dump.
+    The full-text search index is emitted as its CREATE statements plus a
+    rebuild, since raw virtual/shadow table contents cannot be replayed.
+    
+    Args:
+        conn: Database connection
+        
+    Yields:
+        SQL statements
+    """
+    cursor = conn.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='investors_fts'")
+    has_fts = cursor.fetchone() is not None
+    
+    for statement in conn.iterdump():
+        if statement.startswith(('INSERT INTO "investors_fts', "CREATE TABLE 'investors_fts_")):
+            continue
+        if statement.startswith("INSERT INTO sqlite_master") and "'investors_fts'" in statement:
+            continue
+        if statement == "COMMIT;" and has_fts:
+            yield FTS_SQL.strip()
+            yield "INSERT INTO investors_fts(investors_fts) VALUES ('rebuild');"
+        yield statement
+
+
 def export_schema(db_path: str = "data/investors.db", 
                  output_path: str = "schema.sql") -> str:
     """
@@ -3,12 +3,21 @@ Dynamic Schema Management
 Automatically detects and adds new columns to the database
 """
 
+import re
 import sqlite3
 import pandas as pd
+from functools import lru_cache
 from typing import Set, Dict, List
 from loguru import logger
 
 
+# Column lists of the investors table by id(connection): (connection, schema_version, columns)
+_COLUMNS_CACHE: Dict[int, tuple] = {}
+
+NON_WORD_RE = re.compile(r'[^\w]+')
+MULTI_UNDERSCORE_RE = re.compile(r'_+')
+
+
 def detect_column_type(series: pd.Series) -> str:
     """
     Detect the appropriate SQLite type for a pandas Series.
@@ -37,29 +46,15 @@ def detect_column_type(series: pd.Series) -> str:
     if pd.api.types.is_datetime64_any_dtype(series):
         return 'TEXT'  # Store as ISO format string
     
-    # Check if values look like numbers
-    try:
-        numeric_count = 0
-        for val in non_null.head(100):  # Sample first 100 non-null values
-            try:
-                float(str(val).replace(',', '').replace('$', '').replace('€', ''))
-                numeric_count += 1
-            except:
-                pass
-        
-        # If >80% look numeric, might be REAL (but keep as TEXT for flexibility)
-        if numeric_count / min(len(non_null), 100) > 0.8:
-            return 'TEXT'  # Keep as TEXT to preserve formatting
-    except:
-        pass
-    
-    # Default to TEXT
+    # Everything else is TEXT, including number-like strings (keeps their formatting)
     return 'TEXT'
 
 
+@lru_cache(maxsize=4096, typed=True)
 def normalize_column_name(col_name: str) -> str:
     """
     Normalize column names for database storage.
+    Cached, since the same headers recur across sheets and files.
     - Convert to lowercase
     - Replace spaces/special chars with underscores
     - Remove leading/trailing whitespace
@@ -70,13 +65,12 @@ def normalize_column_name(col_name: str) -> str:
     Returns:
         Normalized column name safe for SQL
     """
-    import re
     # Convert to lowercase
     normalized = str(col_name).lower().strip()
     # Replace spaces and special chars with underscores
-    normalized = re.sub(r'[^\w]+', '_', normalized)
+    normalized = NON_WORD_RE.sub('_', normalized)
     # Remove multiple underscores
-    normalized = re.sub(r'_+', '_', normalized)
+    normalized = MULTI_UNDERSCORE_RE.sub('_', normalized)
     # Remove leading/trailing underscores
     normalized = normalized.strip('_')
     # Ensure it's not empty and doesn't start with a number
@@ -119,22 +113,26 @@ def ensure_columns_exist(conn: sqlite3.Connection, columns: Dict[str, str]) -> S
     cursor = conn.cursor()
     
     # Get existing columns
-    cursor.execute("PRAGMA table_info(investors)")
-    existing_columns = {row[1].lower() for row in cursor.fetchall()}
+    existing_columns = {col.lower() for col in get_all_database_columns(conn)}
     
     added_columns = set()
+    missing = {col_name: col_type for col_name, col_type in columns.items()
+               if col_name not in existing_columns}
+    
+    # DDL doesn't open a transaction implicitly; without one every ALTER commits on its own
+    if missing and not conn.in_transaction:
+        cursor.execute("BEGIN IMMEDIATE")
     
     # Add missing columns
-    for col_name, col_type in columns.items():
-        if col_name not in existing_columns:
-            try:
-                # SQLite doesn't support adding NOT NULL columns to existing tables easily
-                # So we add them as nullable
-                cursor.execute(f"ALTER TABLE investors ADD COLUMN {col_name} {col_type}")
-                logger.info(f"Added new column '{col_name}' ({col_type}) to database")
-                added_columns.add(col_name)
-            except sqlite3.OperationalError as e:
-                logger.warning(f"Could not add column '{col_name}': {e}")
+    for col_name, col_type in missing.items():
+        try:
+            # SQLite doesn't support adding NOT NULL columns to existing tables easily
+            # So we add them as nullable
+            cursor.execute(f"ALTER TABLE investors ADD COLUMN {col_name} {col_type}")
+            logger.info(f"Added new column '{col_name}' ({col_type}) to database")
+            added_columns.add(col_name)
+        except sqlite3.OperationalError as e:
+            logger.warning(f"Could not add column '{col_name}': {e}")
     
     conn.commit()
     return added_columns
@@ -151,10 +149,36 @@ def scan_and_update_schema(conn: sqlite3.Connection, df: pd.DataFrame) -> None:
     if df.empty:
         return
     
-    # Get all columns with their types
-    columns = get_all_columns_from_dataframe(df)
+    scan_and_update_schema_multi(conn, {"data": df})
+
+
+def scan_and_update_schema_multi(conn: sqlite3.Connection, frames: Dict[str, pd.DataFrame]) -> None:
+    """
+    Update the database schema for several DataFrames (e.g. all sheets of a file) at once.
+    Column types are only detected for columns missing from the database, once
+    per normalized name, using the first non-empty column with that name.
+    
+    Args:
+        conn: Database connection
+        frames: Dictionary mapping names (e.g. sheet names) to DataFrames
+    """
+    existing_columns = {col.lower() for col in get_all_database_columns(conn)}
+    
+    # One representative Series per missing column
+    samples = {}
+    for df in frames.values():
+        for col in df.columns:
+            normalized = normalize_column_name(col)
+            if normalized in existing_columns:
+                continue
+            if normalized not in samples or (samples[normalized].isna().all() and df[col].notna().any()):
+                samples[normalized] = df[col]
+    
+    if not samples:
+        return
     
     # Ensure they exist in database
+    columns = {normalized: detect_column_type(series) for normalized, series in samples.items()}
     added = ensure_columns_exist(conn, columns)
     
     if added:
@@ -164,6 +188,8 @@ def scan_and_update_schema(conn: sqlite3.Connection, df: pd.DataFrame) -> None:
 def get_all_database_columns(conn: sqlite3.Connection) -> List[str]:
     """
     Get all column names from the investors table.
+    Cached per connection until the schema changes (PRAGMA schema_version is
+    bumped by every ALTER/CREATE/DROP), so repeat calls skip PRAGMA table_info.
     
     Args:
         conn: Database connection
@@ -171,7 +197,14 @@ def get_all_database_columns(conn: sqlite3.Connection) -> List[str]:
     Returns:
         List of column names
     """
-    cursor = conn.cursor()
-    cursor.execute("PRAGMA table_info(investors)")
-    return [row[1] for row in cursor.fetchall()]
+    version = conn.execute("PRAGMA schema_version").fetchone()[0]
+    cached = _COLUMNS_CACHE.get(id(conn))
+    if cached is not None and cached[0] is conn and cached[1] == version:
+        return list(cached[2])
+    
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(investors)")]
+    if len(_COLUMNS_CACHE) >= 16:
+        _COLUMNS_CACHE.clear()  # Don't keep closed connections alive indefinitely
+    _COLUMNS_CACHE[id(conn)] = (conn, version, tuple(columns))
+    return columns
 
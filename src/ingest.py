@@ -4,12 +4,30 @@ Supports: .xlsx, .csv, .tsv, .json, .parquet
 Returns: Dictionary of DataFrames (sheet_name -> DataFrame)
 """
 
+import hashlib
+import json
+import os
+import shutil
+import tempfile
 import pandas as pd
 from pathlib import Path
 from typing import Dict, Union
 from loguru import logger
 
 
+# Parsed sheets of non-Parquet uploads are cached here (next to the raw file)
+# as Parquet, keyed by file content, so re-runs skip Excel/CSV parsing
+PARQUET_CACHE_DIR = ".parquet_cache"
+
+# Cache entries kept per directory (most recently used first); entries for
+# uploads that were replaced or deleted are dropped whenever the cache is written
+PARQUET_CACHE_MAX_ENTRIES = 8
+
+# Last digest per file path with the (size, mtime_ns) it was computed for, so
+# repeated loads of an unchanged file in the same process don't re-hash it
+_DIGEST_CACHE: Dict[str, tuple] = {}
+
+
 def load_file(filepath: Union[str, Path]) -> Dict[str, pd.DataFrame]:
     """
     Load a file and return a dictionary of DataFrames.
@@ -35,8 +53,12 @@ def load_file(filepath: Union[str, Path]) -> Dict[str, pd.DataFrame]:
     
     try:
         if ext == '.xlsx':
-            # Load all sheets from Excel
-            sheets = pd.read_excel(filepath, sheet_name=None, engine='openpyxl')
+            # Load all sheets from Excel (Rust-based calamine reader, openpyxl if it isn't installed)
+            try:
+                sheets = pd.read_excel(filepath, sheet_name=None, engine='calamine')
+            except ImportError:
+                logger.debug("python-calamine not installed, reading Excel with openpyxl")
+                sheets = pd.read_excel(filepath, sheet_name=None, engine='openpyxl')
             logger.info(f"Loaded {len(sheets)} sheets from Excel file")
             return sheets
             
@@ -51,7 +73,7 @@ def load_file(filepath: Union[str, Path]) -> Dict[str, pd.DataFrame]:
             return {"data": df}
             
         elif ext == '.json':
-            df = pd.read_json(filepath, encoding='utf-8')
+            df = _read_json(filepath)
             logger.info(f"Loaded JSON with {len(df)} rows")
             return {"data": df}
             
@@ -68,6 +90,147 @@ def load_file(filepath: Union[str, Path]) -> Dict[str, pd.DataFrame]:
         raise
 
 
+def _read_json(filepath: Path) -> pd.DataFrame:
+    """
+    Read a JSON file (a list of records or a dict of columns) with orjson,
+    or with pd.read_json if orjson isn't installed.
+    
+    Args:
+        filepath: Path to the file
+        
+    Returns:
+        DataFrame with the file's records
+    """
+    try:
+        import orjson
+    except ImportError:
+        return pd.read_json(filepath, encoding='utf-8')
+    
+    data = orjson.loads(filepath.read_bytes())
+    if isinstance(data, list):
+        return pd.DataFrame.from_records(data)
+    return pd.DataFrame(data)
+
+
+def _file_digest(filepath: Path, chunk_size: int = 1024 * 1024) -> str:
+    """SHA-256 of a file's content, read in chunks (memoized while the file is unchanged)."""
+    stat = filepath.stat()
+    key = str(filepath.resolve())
+    cached = _DIGEST_CACHE.get(key)
+    if cached is not None and cached[:2] == (stat.st_size, stat.st_mtime_ns):
+        return cached[2]
+    
+    digest = hashlib.sha256()
+    with open(filepath, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    _DIGEST_CACHE[key] = (stat.st_size, stat.st_mtime_ns, digest.hexdigest())
+    return digest.hexdigest()
+
+
+def _prune_parquet_cache(source_dir: Path, keep: str) -> None:
+    """
+    Evict Parquet cache entries under source_dir: entries whose source file was
+    deleted or replaced by newer content, then the least recently used ones
+    beyond PARQUET_CACHE_MAX_ENTRIES. The entry named keep is never removed.
+    
+    Args:
+        source_dir: Directory holding the source files and the cache
+        keep: Digest of the entry that was just written
+    """
+    cache_root = source_dir / PARQUET_CACHE_DIR
+    entries = []
+    for entry in cache_root.iterdir():
+        if entry.name.startswith('.'):
+            continue  # an entry still being written by load_file_cached
+        manifest_path = entry / "manifest.json"
+        try:
+            source = json.loads(manifest_path.read_text(encoding='utf-8'))["source"]
+            entries.append((manifest_path.stat().st_mtime, entry, source))
+        except Exception:
+            if entry.name != keep:
+                shutil.rmtree(entry, ignore_errors=True)
+    
+    entries.sort(key=lambda item: item[0], reverse=True)
+    kept_sources = {source for _, entry, source in entries if entry.name == keep}
+    
+    kept = 1
+    for _, entry, source in entries:
+        if entry.name == keep:
+            continue
+        # Stale entries: the upload is gone, or the same name now has other content
+        if source in kept_sources or not (source_dir / source).exists() or kept >= PARQUET_CACHE_MAX_ENTRIES:
+            shutil.rmtree(entry, ignore_errors=True)
+        else:
+            kept += 1
+
+
+def load_file_cached(filepath: Union[str, Path]) -> Dict[str, pd.DataFrame]:
+    """
+    Load a file like load_file(), reusing a Parquet copy of its sheets when the
+    same content was loaded before. Parquet files are always read directly.
+    
+    The cache lives in PARQUET_CACHE_DIR next to the file, one entry per
+    content digest. Writing an entry evicts the ones for deleted or replaced
+    uploads and keeps at most PARQUET_CACHE_MAX_ENTRIES, least recently used
+    first out.
+    
+    Args:
+        filepath: Path to the file to load
+        
+    Returns:
+        Dictionary mapping sheet names to DataFrames
+    """
+    filepath = Path(filepath)
+    if filepath.suffix.lower() == '.parquet' or not filepath.exists():
+        return load_file(filepath)
+    
+    cache_dir = filepath.parent / PARQUET_CACHE_DIR / _file_digest(filepath)
+    manifest_path = cache_dir / "manifest.json"
+    
+    if manifest_path.exists():
+        try:
+            manifest = json.loads(manifest_path.read_text(encoding='utf-8'))
+            sheets = {
+                sheet_name: pd.read_parquet(cache_dir / filename)
+                for sheet_name, filename in manifest["sheets"]
+            }
+            os.utime(manifest_path)  # mark as recently used for eviction
+            logger.info(f"Loaded {len(sheets)} cached sheet(s) for {filepath.name} from Parquet")
+            return sheets
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable Parquet cache for {filepath.name}: {str(e)}")
+    
+    sheets = load_file(filepath)
+    
+    # Write the cache into a temporary directory and move it into place once the
+    # manifest is written, so a failed write never leaves a half-written entry;
+    # any sheet pyarrow can't store (e.g. mixed-type columns) disables it
+    tmp_dir = None
+    try:
+        cache_dir.parent.mkdir(parents=True, exist_ok=True)
+        tmp_dir = Path(tempfile.mkdtemp(prefix=f".{cache_dir.name}-", dir=cache_dir.parent))
+        entries = []
+        for i, (sheet_name, df) in enumerate(sheets.items()):
+            filename = f"sheet_{i}.parquet"
+            df.to_parquet(tmp_dir / filename, compression="snappy", row_group_size=100_000)
+            entries.append([sheet_name, filename])
+        (tmp_dir / "manifest.json").write_text(json.dumps({"source": filepath.name, "sheets": entries}),
+                                               encoding='utf-8')
+        shutil.rmtree(cache_dir, ignore_errors=True)  # an unreadable earlier entry
+        os.replace(tmp_dir, cache_dir)
+        tmp_dir = None
+        logger.debug(f"Cached {len(entries)} sheet(s) of {filepath.name} as Parquet")
+        _prune_parquet_cache(filepath.parent, keep=cache_dir.name)
+    except Exception as e:
+        logger.warning(f"Could not cache {filepath.name} as Parquet: {str(e)}")
+    finally:
+        if tmp_dir is not None:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+    
+    return sheets
+
+
 def filter_sheets(sheets: Dict[str, pd.DataFrame], 
                   exclude_keywords: list = None) -> Dict[str, pd.DataFrame]:
     """
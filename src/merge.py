@@ -3,14 +3,78 @@ Smart Merging & Deduplication Module
 Handles fuzzy matching and intelligent merging of investor data
 """
 
+import sqlite3
+import numpy as np
 import pandas as pd
-from typing import Optional, List, Tuple
+from typing import Optional, List, Tuple, Dict
 from pathlib import Path
 from loguru import logger
 from rapidfuzz import fuzz, process
 
-from database import init_database, insert_dataframe, load_all_investors
-from clean import clean_dataframe
+from database import (init_database, finalize_indexes, insert_dataframe, load_all_investors,
+                      update_investor_from_dataframe)
+from clean import clean_dataframe_parallel
+from dynamic_schema import scan_and_update_schema_multi
+
+
+# Minimum location similarity (0-100) for a fuzzy name match to count as a duplicate
+LOCATION_THRESHOLD = 70
+
+# Upper bound on the size of one block of the new x existing score matrices
+MATCH_BLOCK_CELLS = 5_000_000
+
+# Above this many new x existing pairs, find_duplicates only compares names that
+# share NAME_BLOCK_PREFIX leading characters. Blocking can miss duplicates that
+# differ at the start ("The Acme Fund" vs "Acme Fund"), so smaller batches
+# compare every pair
+NAME_BLOCK_MIN_PAIRS = 50_000_000
+NAME_BLOCK_PREFIX = 2
+
+# Existing-record columns read by find_duplicates (the merge itself uses full rows)
+DEDUP_COLUMNS = ['id', 'name', 'location', 'ingested_at',
+                 'portfolio_value', 'deal_size_max', 'no_of_rounds']
+
+# Dedup frames by resolved database path: (file signature, DataFrame)
+_DEDUP_CACHE: Dict[str, tuple] = {}
+
+
+def _db_signature(db_path: Path) -> tuple:
+    """(mtime_ns, size) of the database file and its WAL; changes with every commit."""
+    signature = []
+    for path in (db_path, db_path.with_name(db_path.name + "-wal")):
+        try:
+            stat = path.stat()
+            signature.append((stat.st_mtime_ns, stat.st_size))
+        except FileNotFoundError:
+            signature.append(None)
+    return tuple(signature)
+
+
+def load_dedup_keys(db_path: str = "data/investors.db",
+                    conn: Optional[sqlite3.Connection] = None) -> pd.DataFrame:
+    """
+    Load the existing records for deduplication (DEDUP_COLUMNS only).
+    The frame is cached until the database file or its WAL changes, so a batch
+    of files that adds nothing scans the table once.
+    
+    Args:
+        db_path: Path to SQLite database
+        conn: Existing connection to reuse (left open)
+        
+    Returns:
+        DataFrame with the dedup columns of all investors
+    """
+    db_path = Path(db_path)
+    key = str(db_path.resolve())
+    signature = _db_signature(db_path)
+    
+    cached = _DEDUP_CACHE.get(key)
+    if cached is not None and cached[0] == signature:
+        return cached[1]
+    
+    existing_df = load_all_investors(str(db_path), columns=DEDUP_COLUMNS, conn=conn)
+    _DEDUP_CACHE[key] = (signature, existing_df)
+    return existing_df
 
 
 def fuzzy_match_name_location(name1: str, location1: str, 
@@ -50,22 +114,41 @@ def fuzzy_match_name_location(name1: str, location1: str,
         loc1 = str(location1).lower().strip()
         loc2 = str(location2).lower().strip()
         loc_similarity = fuzz.ratio(loc1, loc2)
-        if loc_similarity >= 70:  # Location similarity threshold
+        if loc_similarity >= LOCATION_THRESHOLD:
             return True
     
     return False
 
 
+def _normalized_text(df: pd.DataFrame, column: str, missing_as_empty: bool) -> np.ndarray:
+    """Lowercased, stripped string values of a column ("" if the column is absent)."""
+    if column not in df.columns:
+        return np.full(len(df), "", dtype=object)
+    values = df[column].astype(str).str.lower().str.strip()
+    if missing_as_empty:
+        values = values.where(df[column].notna(), "")
+    return values.to_numpy(dtype=object)
+
+
 def find_duplicates(new_df: pd.DataFrame, 
                    existing_df: pd.DataFrame,
-                   threshold: int = 85) -> pd.DataFrame:
+                   threshold: int = 85,
+                   block_prefix: Optional[int] = None) -> pd.DataFrame:
     """
     Find duplicate records between new and existing data.
     
+    Uses the same rules as fuzzy_match_name_location, but scores all name and
+    location pairs with rapidfuzz's cdist instead of comparing rows one by one.
+    With block_prefix > 0, records are only compared within blocks of names
+    sharing their first block_prefix characters, so names that differ at the
+    start never match.
+    
     Args:
         new_df: New DataFrame to check
         existing_df: Existing DataFrame to compare against
         threshold: Fuzzy matching threshold
+        block_prefix: Length of the name prefix used as blocking key (0 compares
+            all pairs); if None, NAME_BLOCK_PREFIX above NAME_BLOCK_MIN_PAIRS pairs, else 0
         
     Returns:
         DataFrame with duplicate matches (new_index, existing_index, similarity)
@@ -73,39 +156,77 @@ def find_duplicates(new_df: pd.DataFrame,
     if new_df.empty or existing_df.empty:
         return pd.DataFrame(columns=['new_index', 'existing_index', 'similarity'])
     
-    duplicates = []
+    new_names = _normalized_text(new_df, 'name', missing_as_empty=False)
+    new_locations = _normalized_text(new_df, 'location', missing_as_empty=True)
+    existing_names = _normalized_text(existing_df, 'name', missing_as_empty=False)
+    existing_locations = _normalized_text(existing_df, 'location', missing_as_empty=True)
     
-    for new_idx, new_row in new_df.iterrows():
-        new_name = str(new_row.get('name', '')).lower().strip()
-        new_location = str(new_row.get('location', '')).lower().strip() if not pd.isna(new_row.get('location')) else ""
-        
-        if not new_name:
+    # Score each distinct pair of locations only once
+    new_loc_values, new_loc_codes = np.unique(new_locations, return_inverse=True)
+    existing_loc_values, existing_loc_codes = np.unique(existing_locations, return_inverse=True)
+    loc_scores = process.cdist(new_loc_values, existing_loc_values, scorer=fuzz.ratio, workers=-1)
+    
+    if block_prefix is None:
+        block_prefix = NAME_BLOCK_PREFIX if len(new_df) * len(existing_df) > NAME_BLOCK_MIN_PAIRS else 0
+        if block_prefix:
+            logger.info(f"Matching only names with the same first {block_prefix} characters "
+                        f"({len(new_df)} x {len(existing_df)} records)")
+    
+    # Rows with an empty name are never matched
+    candidates = np.flatnonzero(new_names != "")
+    
+    # Positions of the existing rows in each name block (ascending, so ties still
+    # go to the first existing row)
+    new_keys = pd.Series(new_names[candidates]).str[:block_prefix]
+    existing_keys = pd.Series(existing_names).str[:block_prefix]
+    existing_blocks = existing_keys.groupby(existing_keys).indices
+    
+    matched_rows, matched_existing, matched_scores = [], [], []
+    
+    for key, new_positions in new_keys.groupby(new_keys).indices.items():
+        existing_positions = existing_blocks.get(key)
+        if existing_positions is None:
             continue
+        block_rows = candidates[new_positions]
+        block_size = max(1, MATCH_BLOCK_CELLS // len(existing_positions))
+        block_names = existing_names[existing_positions]
+        block_locations = existing_locations[existing_positions]
+        block_loc_codes = existing_loc_codes[existing_positions]
         
-        # Find best match in existing data
-        best_match = None
-        best_similarity = 0
-        
-        for existing_idx, existing_row in existing_df.iterrows():
-            existing_name = str(existing_row.get('name', '')).lower().strip()
-            existing_location = str(existing_row.get('location', '')).lower().strip() if not pd.isna(existing_row.get('location')) else ""
+        for start in range(0, len(block_rows), block_size):
+            rows = block_rows[start:start + block_size]
             
-            if fuzzy_match_name_location(new_name, new_location, 
-                                        existing_name, existing_location, 
-                                        threshold):
-                name_sim = fuzz.ratio(new_name, existing_name)
-                if name_sim > best_similarity:
-                    best_similarity = name_sim
-                    best_match = existing_idx
-        
-        if best_match is not None:
-            duplicates.append({
-                'new_index': new_idx,
-                'existing_index': best_match,
-                'similarity': best_similarity
-            })
+            # Scores under the threshold come back as 0 (they can't match anyway)
+            name_scores = process.cdist(new_names[rows], block_names, scorer=fuzz.ratio,
+                                        score_cutoff=threshold, workers=-1)
+            
+            # Exact name with the same location, or fuzzy name with a similar location
+            exact = (new_names[rows][:, None] == block_names[None, :]) & \
+                    (new_locations[rows][:, None] == block_locations[None, :])
+            fuzzy = (name_scores >= threshold) & \
+                    (loc_scores[new_loc_codes[rows]][:, block_loc_codes] >= LOCATION_THRESHOLD)
+            
+            # Best match is the highest name similarity (first one on ties)
+            scores = np.where(exact | fuzzy, name_scores, 0.0)
+            best = scores.argmax(axis=1)
+            best_scores = scores[np.arange(len(rows)), best]
+            
+            found = best_scores > 0
+            matched_rows.append(rows[found])
+            matched_existing.append(existing_positions[best[found]])
+            matched_scores.append(best_scores[found])
     
-    return pd.DataFrame(duplicates)
+    if not matched_rows:
+        return pd.DataFrame(columns=['new_index', 'existing_index', 'similarity'])
+    
+    # Report matches in new_df order
+    rows = np.concatenate(matched_rows)
+    order = np.argsort(rows, kind='stable')
+    return pd.DataFrame({
+        'new_index': new_df.index[rows[order]],
+        'existing_index': existing_df.index[np.concatenate(matched_existing)[order]],
+        'similarity': np.concatenate(matched_scores)[order]
+    })
 
 
 def merge_strategy_keep_latest(new_row: pd.Series, existing_row: pd.Series) -> pd.Series:
@@ -149,10 +270,81 @@ def merge_strategy_merge_fields(new_row: pd.Series, existing_row: pd.Series) ->
     return merged
 
 
+def _as_datetimes(df: pd.DataFrame, column: str) -> pd.Series:
+    """Column parsed as datetimes (Timestamp.min if the column is absent)."""
+    if column not in df.columns:
+        return pd.Series(pd.Timestamp.min, index=df.index)
+    return pd.to_datetime(df[column], format='mixed')
+
+
+def _as_numbers(df: pd.DataFrame, column: str) -> pd.Series:
+    """Column as floats (0 if the column is absent)."""
+    if column not in df.columns:
+        return pd.Series(0.0, index=df.index)
+    return df[column].astype(float)
+
+
+def _merge_duplicate_rows(new_sub: pd.DataFrame,
+                          existing_sub: pd.DataFrame,
+                          strategy: str) -> pd.DataFrame:
+    """
+    Apply a merge strategy to row-aligned duplicate pairs in whole-column operations.
+    Mirrors the merge_strategy_* functions, restricted to the existing columns.
+    
+    Args:
+        new_sub: New rows, one per duplicate pair
+        existing_sub: Matching existing rows, aligned with new_sub
+        strategy: Merge strategy ("keep_latest", "keep_richest", "merge_fields");
+            unknown names fall back to keep_latest
+        
+    Returns:
+        Merged rows with existing_sub's index and columns
+    """
+    # Columns only in new_df are dropped, columns it lacks become missing values.
+    # Cleaned extension dtypes (categoricals, Int32) are turned into plain
+    # float/object columns like the ones loaded from the database
+    new_aligned = new_sub.reindex(columns=existing_sub.columns)
+    plain_dtypes = {
+        col: float if pd.api.types.is_numeric_dtype(dtype) else object
+        for col, dtype in new_aligned.dtypes.items()
+        if isinstance(dtype, pd.api.extensions.ExtensionDtype)
+    }
+    if plain_dtypes:
+        new_aligned = new_aligned.astype(plain_dtypes)
+    
+    if strategy == "merge_fields":
+        # Prefer non-null values, then the newer ingested_at and the larger numbers
+        merged = existing_sub.where(existing_sub.notna(), new_aligned)
+        prefer_new = {}
+        if 'ingested_at' in new_sub.columns and 'ingested_at' in existing_sub.columns:
+            prefer_new['ingested_at'] = _as_datetimes(new_sub, 'ingested_at') > \
+                                        _as_datetimes(existing_sub, 'ingested_at')
+        for col in ['portfolio_value', 'deal_size_max', 'no_of_rounds']:
+            if col in new_sub.columns and col in existing_sub.columns:
+                prefer_new[col] = new_aligned[col] > existing_sub[col]
+        for col, mask in prefer_new.items():
+            merged[col] = merged[col].where(~mask, new_aligned[col])
+        return merged
+    
+    # Whole-row strategies: take the new row where it wins
+    if strategy == "keep_richest":
+        take_new = _as_numbers(new_sub, 'portfolio_value') > _as_numbers(existing_sub, 'portfolio_value')
+    else:
+        take_new = _as_datetimes(new_sub, 'ingested_at') > _as_datetimes(existing_sub, 'ingested_at')
+    return existing_sub.mask(take_new, new_aligned, axis=0)
+
+
+def _changed_rows(updated: pd.DataFrame, original: pd.DataFrame) -> np.ndarray:
+    """Boolean mask of the rows where any value differs (missing values compare equal)."""
+    same = (updated == original) | (updated.isna() & original.isna())
+    return ~same.all(axis=1).to_numpy()
+
+
 def deduplicate_and_merge(new_df: pd.DataFrame,
                          existing_df: pd.DataFrame,
                          strategy: str = "keep_latest",
-                         threshold: int = 85) -> Tuple[pd.DataFrame, pd.DataFrame]:
+                         threshold: int = 85,
+                         duplicates: Optional[pd.DataFrame] = None) -> Tuple[pd.DataFrame, pd.DataFrame]:
     """
     Deduplicate and merge new data with existing data.
     
@@ -161,6 +353,8 @@ def deduplicate_and_merge(new_df: pd.DataFrame,
         existing_df: Existing DataFrame
         strategy: Merge strategy ("keep_latest", "keep_richest", "merge_fields")
         threshold: Fuzzy matching threshold
+        duplicates: Matches already found by find_duplicates (new_index,
+            existing_index into existing_df); found here if None
         
     Returns:
         Tuple of (unique_new_records, updated_existing_records)
@@ -174,59 +368,71 @@ def deduplicate_and_merge(new_df: pd.DataFrame,
         return new_df, existing_df
     
     # Find duplicates
-    duplicates = find_duplicates(new_df, existing_df, threshold)
+    if duplicates is None:
+        duplicates = find_duplicates(new_df, existing_df, threshold)
     
     logger.info(f"Found {len(duplicates)} potential duplicates")
     
-    # Get strategy function
-    strategy_funcs = {
-        "keep_latest": merge_strategy_keep_latest,
-        "keep_richest": merge_strategy_keep_richest,
-        "merge_fields": merge_strategy_merge_fields
-    }
+    # Duplicate pairs as two row-aligned frames (positional index, existing columns)
+    new_sub = new_df.loc[duplicates['new_index'].to_numpy()].reset_index(drop=True)
+    existing_sub = existing_df.loc[duplicates['existing_index'].to_numpy()].reset_index(drop=True)
+    merged = _merge_duplicate_rows(new_sub, existing_sub, strategy)
     
-    merge_func = strategy_funcs.get(strategy, merge_strategy_keep_latest)
+    # Every duplicate is dropped from new_df; existing rows are only rewritten
+    # where merging changed a value (the last such pair wins for the same row)
+    unique_new = new_df.drop(index=duplicates['new_index'].unique()).copy()
     
-    # Process duplicates
-    new_indices_to_remove = set()
-    existing_indices_to_update = {}
+    changed = _changed_rows(merged, existing_sub)
+    updates = merged[changed].set_axis(duplicates['existing_index'].to_numpy()[changed])
+    updates = updates[~updates.index.duplicated(keep='last')]
     
-    for _, dup in duplicates.iterrows():
-        new_idx = dup['new_index']
-        existing_idx = dup['existing_index']
-        
-        new_row = new_df.loc[new_idx]
-        existing_row = existing_df.loc[existing_idx]
-        
-        # Apply merge strategy
-        merged_row = merge_func(new_row, existing_row)
-        
-        # If merged row is the existing one, remove from new
-        if merged_row.equals(existing_row):
-            new_indices_to_remove.add(new_idx)
-        else:
-            # Update existing record
-            existing_indices_to_update[existing_idx] = merged_row
-            new_indices_to_remove.add(new_idx)
-    
-    # Remove duplicates from new_df
-    unique_new = new_df.drop(index=new_indices_to_remove).copy()
-    
-    # Update existing records
-    updated_existing = existing_df.copy()
-    for idx, merged_row in existing_indices_to_update.items():
-        updated_existing.loc[idx] = merged_row
+    # Columns the merge widened (e.g. floats taking an all-None new column) become objects
+    widened = {col: object for col in updates.columns if updates[col].dtype != existing_df[col].dtype}
+    updated_existing = existing_df.astype(widened) if widened else existing_df.copy()
+    updated_existing.loc[updates.index] = updates
+    existing_updated = len(updates)
     
     logger.info(f"After deduplication: {len(unique_new)} new unique records, "
-                f"{len(existing_indices_to_update)} existing records updated")
+                f"{existing_updated} existing records updated")
     
     return unique_new, updated_existing
 
 
+def _load_matched_rows(conn: sqlite3.Connection,
+                       new_df: pd.DataFrame,
+                       existing_df: pd.DataFrame,
+                       threshold: int) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Match new_df against the dedup frame and load the full stored rows (every
+    column) of the matched records, so merge strategies can act on whole rows.
+    
+    Args:
+        conn: Database connection
+        new_df: New DataFrame to check
+        existing_df: Dedup frame of existing records (see load_dedup_keys)
+        threshold: Fuzzy matching threshold
+        
+    Returns:
+        Tuple of (duplicates from find_duplicates, matched rows in existing_df's
+        order and with its index, so the duplicates' existing_index points into them)
+    """
+    duplicates = find_duplicates(new_df, existing_df, threshold)
+    matched = existing_df[existing_df.index.isin(duplicates['existing_index'])]
+    if matched.empty:
+        return duplicates, matched
+    
+    rows = load_all_investors(columns=None, conn=conn, ids=matched['id'].tolist())
+    rows = rows.set_index('id', drop=False).reindex(matched['id'].to_numpy())
+    rows.index = matched.index
+    return duplicates, rows
+
+
 def ingest_and_merge(filepath: str,
                     db_path: str = "data/investors.db",
                     merge_strategy: str = "keep_latest",
-                    fuzzy_threshold: int = 85) -> dict:
+                    fuzzy_threshold: int = 85,
+                    sheets: Optional[Dict[str, pd.DataFrame]] = None,
+                    conn: Optional[sqlite3.Connection] = None) -> dict:
     """
     Complete pipeline: ingest file, clean, merge with existing data, save to DB.
     
@@ -235,6 +441,9 @@ def ingest_and_merge(filepath: str,
         db_path: Path to SQLite database
         merge_strategy: Merge strategy to use
         fuzzy_threshold: Fuzzy matching threshold
+        sheets: Already-loaded (and filtered) sheets for this file, so callers
+            can parse files ahead of time; loaded from filepath if None
+        conn: Existing connection to reuse (left open); opened from db_path if None
         
     Returns:
         Dictionary with processing results
@@ -253,20 +462,21 @@ def ingest_and_merge(filepath: str,
     
     try:
         # Load file
-        sheets = load_file(filepath)
-        sheets = filter_sheets(sheets)
+        if sheets is None:
+            sheets = load_file(filepath)
+            sheets = filter_sheets(sheets)
         
         # Initialize database
-        conn = init_database(db_path)
+        # Indexes missing from a new database are built once, after the inserts
+        own_conn = conn is None
+        if own_conn:
+            conn = init_database(db_path, create_indexes=False)
         
-        # Load existing data
-        existing_df = load_all_investors(db_path)
-        
-        # Process each sheet
+        # Clean every sheet first so the schema is updated once for the whole file
+        cleaned_sheets = {}
         for sheet_name, df in sheets.items():
             try:
-                # Clean the data
-                cleaned_df = clean_dataframe(
+                cleaned_df = clean_dataframe_parallel(
                     df,
                     sheet_name=sheet_name,
                     source_file=filepath.name
@@ -276,24 +486,50 @@ def ingest_and_merge(filepath: str,
                     logger.warning(f"Sheet {sheet_name} produced no valid rows after cleaning")
                     continue
                 
-                # Deduplicate and merge
+                cleaned_sheets[sheet_name] = cleaned_df
+                
+            except Exception as e:
+                error_msg = f"Error processing sheet {sheet_name}: {str(e)}"
+                logger.error(error_msg)
+                results["errors"].append(error_msg)
+        
+        if cleaned_sheets:
+            scan_and_update_schema_multi(conn, cleaned_sheets)
+        
+        # Process each sheet
+        for sheet_name, cleaned_df in cleaned_sheets.items():
+            try:
+                # Existing data (only what matching needs), reloaded once a previous
+                # sheet has written to the database
+                existing_df = load_dedup_keys(db_path, conn=conn)
+                
+                # Deduplicate and merge against the full rows of the matched records,
+                # so every column of a duplicate follows the merge strategy
+                duplicates, matched_df = _load_matched_rows(conn, cleaned_df, existing_df, fuzzy_threshold)
                 unique_new, updated_existing = deduplicate_and_merge(
                     cleaned_df,
-                    existing_df,
+                    matched_df,
                     strategy=merge_strategy,
-                    threshold=fuzzy_threshold
+                    threshold=fuzzy_threshold,
+                    duplicates=duplicates
                 )
                 
                 # Insert new unique records
                 if not unique_new.empty:
                     rows_added = insert_dataframe(conn, unique_new)
                     results["rows_added"] += rows_added
+                    _DEDUP_CACHE.pop(str(Path(db_path).resolve()), None)
                 
-                # Update existing records (delete old, insert new)
-                if not updated_existing.empty and len(updated_existing) > len(existing_df):
-                    # This is simplified - in production, you'd want to update in place
-                    # For now, we'll just insert and let the unique constraint handle it
-                    pass
+                # Write merged existing records back in place (by id, in one set-based UPDATE).
+                # Values missing from the winning row keep their stored value, since
+                # update_investor_from_dataframe never writes NULLs
+                merged_columns = matched_df.columns.drop('id', errors='ignore')
+                changed = _changed_rows(updated_existing[merged_columns], matched_df[merged_columns])
+                if changed.any() and 'id' in matched_df.columns:
+                    updates = updated_existing.loc[changed, merged_columns]
+                    updates.insert(0, 'id', matched_df.loc[changed, 'id'])
+                    results["rows_updated"] += update_investor_from_dataframe(conn, updates)
+                    _DEDUP_CACHE.pop(str(Path(db_path).resolve()), None)
                 
                 results["sheets_processed"] += 1
                 
@@ -302,7 +538,9 @@ def ingest_and_merge(filepath: str,
                 logger.error(error_msg)
                 results["errors"].append(error_msg)
         
-        conn.close()
+        if own_conn:
+            finalize_indexes(conn)
+            conn.close()
         
         logger.info(f"Processing complete: {results}")
         return results
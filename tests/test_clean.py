@@ -0,0 +1,42 @@
+"""
+Tests for the cleaning module: clean_dataframe must not modify its input
+"""
+
+import sys
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+# Modules in src/ import each other by bare name, as in the app
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from clean import clean_dataframe  # noqa: E402
+
+
+@pytest.fixture
+def raw_df() -> pd.DataFrame:
+    return pd.DataFrame({
+        'name': ['  Acme Ventures ', 'Blue Fund', None],
+        'location': ['Berlin', 'nan', 'Zagreb'],
+        'portfolio_value': ['$5m', '900k', None],
+        'deal_size': ['$1M-$5M', '10k', None],
+        'website': ['acme.vc', None, 'n/a'],
+        'Brand New': ['x', 'y', 'z'],
+    })
+
+
+@pytest.mark.parametrize("map_column_names", [True, False])
+def test_clean_dataframe_leaves_input_unchanged(raw_df, map_column_names):
+    before = raw_df.copy(deep=True)
+
+    cleaned = clean_dataframe(raw_df, sheet_name="Croatia", source_file="test.xlsx",
+                              column_mapping={}, map_column_names=map_column_names)
+
+    pd.testing.assert_frame_equal(raw_df, before)
+    assert 'deal_size_min' in cleaned.columns
+    assert 'deal_size_min' not in raw_df.columns
+
+
+def test_importing_clean_keeps_pandas_defaults():
+    assert not pd.get_option("mode.copy_on_write")